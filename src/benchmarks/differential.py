@@ -0,0 +1,264 @@
+"""Differential fuzzing of the account engine against the frozen reference.
+
+Run from src/:  python -m benchmarks.differential --seeds 20 --transactions 2000
+
+Each seed generates a random history for one account (backdated entries,
+several transactions per day, rules on month boundaries, leap years) and
+replays it through the reference (tests/reference_account.py) and the engine
+under test, comparing every accept/reject, the full statement, opening
+balances, month transactions and monthly statements. Two differences are
+intended and not reported:
+
+- the engine rejects a backdated withdrawal that would overdraw a later date
+  ("Insufficient funds"), which the reference accepts; it is not replayed,
+  but the reference's ledger is checked to really go below zero on or after
+  the withdrawal's date, and a reject that would not is a divergence;
+- the reference credits the last day of a month at the previous day's balance
+  and rate, so interest is not compared for months with an event on the last
+  day.
+"""
+
+import argparse
+import calendar
+import random
+import sys
+import time
+from collections import defaultdict
+from classes.account import Account
+from classes.interest import Interest, InterestRuleTimeline
+from tests.reference_account import ReferenceAccount
+
+ACCOUNT_ID = "AC001"
+
+
+class Divergence:
+    def __init__(self, seed, step, operation, arguments, expected, actual):
+        self.seed = seed
+        self.step = step
+        self.operation = operation
+        self.arguments = arguments
+        self.expected = expected
+        self.actual = actual
+
+    def __str__(self):
+        return (
+            f"seed {self.seed}, step {self.step}: {self.operation}{self.arguments}\n"
+            f"  reference: {self.expected!r}\n"
+            f"  engine:    {self.actual!r}"
+        )
+
+
+class DifferentialReport:
+    def __init__(self):
+        self.histories = 0
+        self.transactions = 0
+        self.comparisons = 0
+        self.stricter_rejects = 0  # withdrawals only the engine rejects
+        self.skipped_interest = 0  # months with an event on the last day
+        self.reference_seconds = 0.0
+        self.engine_seconds = 0.0
+        self.divergence = None  # first Divergence found, if any
+
+    def summary(self):
+        speedup = 0
+        if self.engine_seconds:
+            speedup = self.reference_seconds / self.engine_seconds
+        result = "no divergence" if self.divergence is None else "DIVERGED"
+        return (
+            f"{self.histories} histories, {self.transactions} transactions, "
+            f"{self.comparisons} comparisons: {result}\n"
+            f"intended differences: {self.stricter_rejects} stricter rejects, "
+            f"{self.skipped_interest} interest lines skipped\n"
+            f"reference {self.reference_seconds:.3f}s, engine "
+            f"{self.engine_seconds:.3f}s ({speedup:.1f}x)"
+        )
+
+
+def history(rng, transactions, rules):
+    """Yield ("T", date, type, amount) and ("I", date, rule id, rate) steps over
+    two years, one of them a leap year."""
+    first_year = rng.choice((2019, 2023))
+    months = [
+        (year, month) for year in (first_year, first_year + 1) for month in range(1, 13)
+    ]
+    dates = []
+    for _ in range(transactions):
+        year, month = rng.choice(months)
+        last_day = calendar.monthrange(year, month)[1]
+        # month boundaries and 29 February are overrepresented
+        day = rng.choice((1, last_day, last_day - 1, rng.randint(1, last_day)))
+        if dates and rng.random() < 0.2:
+            dates.append(dates[-1])  # several transactions on one day
+        elif dates and rng.random() < 0.6:
+            dates.append(max(dates[-1], f"{year}{month:02}{day:02}"))
+        else:
+            dates.append(f"{year}{month:02}{day:02}")  # usually backdated
+    rule_steps = set(rng.sample(range(transactions), min(rules, transactions)))
+    for step, date_str in enumerate(dates):
+        if step in rule_steps:
+            year, month = rng.choice(months)
+            last_day = calendar.monthrange(year, month)[1]
+            day = rng.choice((1, 1, last_day, rng.randint(1, 28)))
+            rate = rng.randint(1, 500) / 100
+            yield "I", f"{year}{month:02}{day:02}", f"RULE{step:05d}", rate
+        type_str = "W" if rng.random() < 0.35 else "D"
+        yield "T", date_str, type_str, f"{rng.randint(1, 200000) / 100:.2f}"
+
+
+def timed_call(report, attribute, function, *arguments):
+    started = time.perf_counter()
+    result = function(*arguments)
+    elapsed = time.perf_counter() - started
+    setattr(report, attribute, getattr(report, attribute) + elapsed)
+    return result
+
+
+def run_seed(seed, transactions, rules, report, engine=Account, check_every=250):
+    """Replay one seeded history; returns the first Divergence or None."""
+    rng = random.Random(seed)
+    reference, account = ReferenceAccount(ACCOUNT_ID), engine(ACCOUNT_ID)
+    timeline = InterestRuleTimeline()
+    event_dates = set()
+    report.histories += 1
+    steps = history(rng, transactions, rules)
+    for step, (kind, date_str, *details) in enumerate(steps):
+        event_dates.add(date_str)
+        if kind == "I":
+            timeline.upsert(Interest(date_str, *details))
+            continue
+        report.transactions += 1
+        arguments = (date_str, ACCOUNT_ID, *details)
+        actual = timed_call(
+            report, "engine_seconds", account.add_transaction, *arguments
+        )
+        if actual == (False, "Insufficient funds. \n"):
+            report.comparisons += 1
+            if not overdraws(reference, date_str, details[1]):
+                expected = "accepted, no balance on or after the date goes below zero"
+                return Divergence(
+                    seed, step, "add_transaction", arguments, expected, actual
+                )
+            report.stricter_rejects += 1
+            continue
+        expected = timed_call(
+            report, "reference_seconds", reference.add_transaction, *arguments
+        )
+        report.comparisons += 1
+        if actual != expected:
+            return Divergence(seed, step, "add_transaction", arguments, expected, actual)
+        if step % check_every == check_every - 1:
+            divergence = compare_state(
+                seed, step, reference, account, timeline, event_dates, report, rng
+            )
+            if divergence:
+                return divergence
+    return compare_state(
+        seed, "end", reference, account, timeline, event_dates, report
+    )
+
+
+def overdraws(reference, date_str, amount_str):
+    # whether withdrawing amount_str on date_str takes the end of day balance
+    # of that date or any later one below zero, on the reference's ledger
+    cents = round(float(amount_str) * 100)
+    daily_totals = defaultdict(int, {date_str: 0})
+    for txn in reference.transactions:
+        amount = round(txn.amount * 100)
+        daily_totals[txn.date] += amount if txn.type == "D" else -amount
+    balance = 0
+    for day in sorted(daily_totals):
+        balance += daily_totals[day]
+        if day >= date_str and balance < cents:
+            return True
+    return False
+
+
+def rows(statement):
+    # a monthly statement without its interest line
+    return statement.splitlines()[:-1]
+
+
+def month_rows(transactions):
+    return [
+        (txn.date, txn.txn_id, txn.type, f"{txn.amount:.2f}") for txn in transactions
+    ]
+
+
+def compare_state(
+    seed, step, reference, account, timeline, event_dates, report, rng=None
+):
+    # every month with a transaction, or three of them when rng is given
+    months = sorted(
+        {(int(txn.date[:4]), int(txn.date[4:6])) for txn in reference.transactions}
+    )
+    if rng is not None and len(months) > 3:
+        months = rng.sample(months, 3)
+    rules = list(timeline)
+    # (operation, reference arguments, engine arguments, normalize)
+    checks = [("generate_all_statements", (), (), str)]
+    for year, month in months:
+        month_key = (year, month)
+        checks.append(("get_balance_before_date", month_key, month_key, "{:.2f}".format))
+        checks.append(("get_transactions_in_month", month_key, month_key, month_rows))
+        last_day = calendar.monthrange(year, month)[1]
+        normalize = str
+        if f"{year}{month:02}{last_day:02}" in event_dates:
+            # the reference's last-day interest is wrong here, compare the rows only
+            report.skipped_interest += 1
+            normalize = rows
+        checks.append(
+            (
+                "generate_monthly_statement",
+                (year, month, rules),
+                (year, month, timeline),
+                normalize,
+            )
+        )
+    for operation, reference_arguments, engine_arguments, normalize in checks:
+        expected = timed_call(
+            report,
+            "reference_seconds",
+            getattr(reference, operation),
+            *reference_arguments,
+        )
+        actual = timed_call(
+            report, "engine_seconds", getattr(account, operation), *engine_arguments
+        )
+        report.comparisons += 1
+        if normalize(expected) != normalize(actual):
+            return Divergence(
+                seed,
+                step,
+                operation,
+                engine_arguments[:2],
+                normalize(expected),
+                normalize(actual),
+            )
+    return None
+
+
+def run(seeds, transactions=2000, rules=20, first_seed=0, engine=Account):
+    report = DifferentialReport()
+    for seed in range(first_seed, first_seed + seeds):
+        report.divergence = run_seed(seed, transactions, rules, report, engine)
+        if report.divergence is not None:
+            break
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seeds", type=int, default=20, help="histories to replay")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--transactions", type=int, default=2000, help="per history")
+    parser.add_argument("--rules", type=int, default=20, help="per history")
+    args = parser.parse_args(argv)
+    report = run(args.seeds, args.transactions, args.rules, args.first_seed)
+    print(report.summary())
+    if report.divergence is not None:
+        print(f"first divergence: {report.divergence}")
+    return report
+
+
+if __name__ == "__main__":
+    sys.exit(main().divergence is not None)
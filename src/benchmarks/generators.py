@@ -0,0 +1,58 @@
+import calendar
+import datetime
+import random
+
+
+def random_date(rng, first_year, last_year):
+    year = rng.randint(first_year, last_year)
+    month = rng.randint(1, 12)
+    day = rng.randint(1, calendar.monthrange(year, month)[1])
+    return f"{year}{month:02}{day:02}"
+
+
+def transaction_lines(
+    count,
+    accounts=100,
+    skew=1.2,
+    backdated_ratio=0.1,
+    withdrawal_ratio=0.3,
+    first_year=2015,
+    last_year=2024,
+    seed=0,
+):
+    """Yield count "<Date> <Account> <Type> <Amount>" lines.
+
+    Account activity follows a Zipf-like distribution (skew=0 is uniform), so a
+    few accounts hold most of the transactions. Most lines move forward in time
+    per account; backdated_ratio of them land on a random date anywhere in the
+    range instead, usually before the account's latest transaction.
+    """
+    rng = random.Random(seed)
+    account_ids = [f"AC{index:06d}" for index in range(accounts)]
+    weights = [1 / (rank + 1) ** skew for rank in range(accounts)]
+    # spread the forward-moving dates evenly over the requested years
+    first_day = datetime.date(first_year, 1, 1).toordinal()
+    span = datetime.date(last_year, 12, 31).toordinal() - first_day + 1
+    step = max(span * accounts // max(count, 1), 1)
+    clocks = {}
+    for account_id in rng.choices(account_ids, weights, k=count):
+        seen = account_id in clocks
+        clock = clocks.get(account_id, 0)
+        if seen and rng.random() < backdated_ratio:
+            date_str = random_date(rng, first_year, last_year)
+        else:
+            clock = min(clock + rng.randint(0, 2 * step), span - 1)
+            clocks[account_id] = clock
+            date_str = datetime.date.fromordinal(first_day + clock).strftime("%Y%m%d")
+        # an account's first line is a deposit so it has something to withdraw
+        type_str = "W" if seen and rng.random() < withdrawal_ratio else "D"
+        yield f"{date_str} {account_id} {type_str} {rng.randint(1, 100000) / 100:.2f}"
+
+
+def rule_lines(count, first_year=2015, last_year=2024, seed=0):
+    """Yield count "<Date> <RuleId> <Rate in %>" lines. A count close to the
+    number of days in the range gives a dense history, a handful a sparse one."""
+    rng = random.Random(seed)
+    for index in range(count):
+        date_str = random_date(rng, first_year, last_year)
+        yield f"{date_str} RULE{index:05d} {rng.randint(1, 999) / 100:.2f}"
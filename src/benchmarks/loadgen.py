@@ -0,0 +1,92 @@
+"""Load generator for the line protocol server.
+
+Run from src/:  python -m benchmarks.loadgen --clients 50 --requests 2000 --pipeline 32
+Without --port an in-process server on an ephemeral port is started first.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from classes.bank import Bank
+from classes.server import BankServer
+
+
+async def read_response(reader):
+    status = (await reader.readline()).decode()
+    if status.startswith("OK "):
+        for _ in range(int(status[3:])):
+            await reader.readline()
+    return status.startswith("OK ")
+
+
+async def client(host, port, index, requests, pipeline, seed):
+    """One session sending requests in pipelined batches. Returns (ok, err)."""
+    rng = random.Random(seed + index)
+    reader, writer = await asyncio.open_connection(host, port)
+    account_id = f"LG{index:05d}"
+    commands = [f"T 20230601 {account_id} D 100.00"]
+    while len(commands) < requests:
+        if rng.random() < 0.8:
+            day = rng.randint(2, 28)
+            commands.append(f"T 202306{day:02} {account_id} {rng.choice('DW')} {rng.randint(1, 500) / 100:.2f}")
+        else:
+            commands.append(f"P {account_id} 202306")
+    succeeded = failed = 0
+    for start in range(0, len(commands), pipeline):
+        batch = commands[start : start + pipeline]
+        writer.write("".join(command + "\n" for command in batch).encode())
+        await writer.drain()
+        for _ in batch:
+            if await read_response(reader):
+                succeeded += 1
+            else:
+                failed += 1
+    writer.write(b"Q\n")
+    await writer.drain()
+    writer.close()
+    return succeeded, failed
+
+
+async def run(args):
+    server = None
+    host, port = args.host, args.port
+    if port is None:
+        bank = Bank(echo_tail=args.tail)
+        server = await BankServer(bank).start(host, 0)
+        port = server.sockets[0].getsockname()[1]
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(
+            client(host, port, index, args.requests, args.pipeline, args.seed)
+            for index in range(args.clients)
+        )
+    )
+    elapsed = time.perf_counter() - started
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+    succeeded = sum(ok for ok, _ in results)
+    failed = sum(err for _, err in results)
+    total = succeeded + failed
+    print(
+        f"{args.clients} clients, {total} requests ({failed} ERR) in {elapsed:.2f}s: "
+        f"{total / elapsed:,.0f} requests/s"
+    )
+    return total, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000, help="per client")
+    parser.add_argument("--pipeline", type=int, default=32, help="requests in flight per client")
+    parser.add_argument("--tail", type=int, default=5, help="rows echoed by the in-process server")
+    parser.add_argument("--seed", type=int, default=0)
+    return asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
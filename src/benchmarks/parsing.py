@@ -0,0 +1,72 @@
+"""Micro-benchmark of prompt field parsing: utils.parsing against the
+strptime / float() validation it replaced.
+
+Run from src/:  python -m benchmarks.parsing --lines 200000
+"""
+
+import argparse
+import time
+from benchmarks.generators import transaction_lines
+from utils.parsing import parse_cents, parse_date, parse_type
+from utils.utils import validate_date
+
+
+def legacy_parse(date_str, type_str, amount_str):
+    # the validation Account.validate_transaction used to do
+    if not validate_date(date_str):
+        return None
+    type_str = type_str.upper()
+    if type_str not in ("D", "W"):
+        return None
+    try:
+        cents = round(round(float(amount_str), 2) * 100)
+    except (ValueError, OverflowError):
+        return None
+    return int(date_str), type_str, cents
+
+
+def fast_parse(date_str, type_str, amount_str):
+    day, type_str = parse_date(date_str), parse_type(type_str)
+    cents, message = parse_cents(amount_str)
+    if day is None or type_str is None or message:
+        return None
+    return day, type_str, cents
+
+
+def time_parser(parse, fields):
+    started = time.perf_counter()
+    for date_str, _, type_str, amount_str in fields:
+        parse(date_str, type_str, amount_str)
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    fields = [line.split() for line in transaction_lines(args.lines, seed=args.seed)]
+    parse_date.cache_clear()
+    for date_str, _, type_str, amount_str in fields:
+        # both parsers must agree before their speed is worth comparing
+        assert legacy_parse(date_str, type_str, amount_str) == fast_parse(
+            date_str, type_str, amount_str
+        )
+    parse_date.cache_clear()
+    legacy = time_parser(legacy_parse, fields)
+    fast = time_parser(fast_parse, fields)
+    result = {
+        "lines": len(fields),
+        "legacy_lines_per_sec": len(fields) / legacy if legacy else 0,
+        "fast_lines_per_sec": len(fields) / fast if fast else 0,
+        "speedup": legacy / fast if fast else 0,
+    }
+    print(
+        f"{result['lines']} lines: strptime/float {result['legacy_lines_per_sec']:,.0f}/s, "
+        f"parsing {result['fast_lines_per_sec']:,.0f}/s ({result['speedup']:.1f}x)"
+    )
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Benchmarks for the ingest and statement hot paths.
+
+Run from src/:  python -m benchmarks.run --sizes 1000 100000 --out results.json
+Compare with an earlier run:  python -m benchmarks.run --compare results.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from classes.bank import Bank
+from benchmarks.generators import rule_lines, transaction_lines
+
+
+def measure(name, size, operations):
+    """Time each call in operations and summarize ops/sec and latency."""
+    latencies = []
+    started = time.perf_counter()
+    for operation in operations:
+        start = time.perf_counter_ns()
+        operation()
+        latencies.append(time.perf_counter_ns() - start)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    count = len(latencies)
+    return {
+        "scenario": name,
+        "size": size,
+        "operations": count,
+        "ops_per_sec": count / elapsed if elapsed else 0,
+        "p50_us": latencies[count // 2] / 1000 if count else 0,
+        "p99_us": latencies[min(count * 99 // 100, count - 1)] / 1000 if count else 0,
+    }
+
+
+def trace_peak(name, size, operations):
+    """Run operations under tracemalloc and report their peak traced memory.
+
+    Tracing slows allocation-heavy calls about tenfold, so this is a separate
+    pass from measure() and its timings are not reported.
+    """
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    for operation in operations:
+        operation()
+    peak = tracemalloc.get_traced_memory()[1]
+    if not tracing:
+        tracemalloc.stop()
+    return {"scenario": name, "size": size, "peak_memory_kb": peak // 1024}
+
+
+def run_size(size, args, scenario=measure):
+    rng = random.Random(args.seed)
+    bank = Bank()
+    lines = [
+        line.split()
+        for line in transaction_lines(
+            size,
+            accounts=args.accounts,
+            backdated_ratio=args.backdated_ratio,
+            seed=args.seed,
+        )
+    ]
+    rules = [line.split() for line in rule_lines(args.rules, seed=args.seed)]
+    results = [
+        scenario(
+            "add_interest_rule",
+            size,
+            (lambda parts=parts: bank.add_interest_rule(*parts) for parts in rules),
+        ),
+        scenario(
+            "add_transaction",
+            size,
+            (lambda parts=parts: bank.add_transaction(*parts) for parts in lines),
+        ),
+    ]
+    accounts = list(bank.accounts.values())
+    queries = [
+        (rng.choice(accounts), rng.randint(2015, 2024), rng.randint(1, 12))
+        for _ in range(min(size, args.queries))
+    ]
+    results.append(
+        scenario(
+            "get_balance_before_date",
+            size,
+            (lambda q=q: q[0].get_balance_before_date(q[1], q[2]) for q in queries),
+        )
+    )
+    results.append(
+        scenario(
+            "get_transactions_in_month",
+            size,
+            (lambda q=q: q[0].get_transactions_in_month(q[1], q[2]) for q in queries),
+        )
+    )
+    results.append(
+        scenario(
+            "generate_monthly_statement",
+            size,
+            (
+                lambda q=q: q[0].generate_monthly_statement(
+                    q[1], q[2], bank.interest_rules
+                )
+                for q in queries
+            ),
+        )
+    )
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    before = {(r["scenario"], r["size"]): r for r in previous["results"]}
+    for result in current["results"]:
+        old = before.get((result["scenario"], result["size"]))
+        if old and old["ops_per_sec"]:
+            ratio = result["ops_per_sec"] / old["ops_per_sec"]
+            print(
+                f"{result['scenario']:28} {result['size']:>9}  {ratio:6.2f}x ops/sec "
+                f"(p99 {old['p99_us']:.1f}us -> {result['p99_us']:.1f}us)"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--backdated-ratio", type=float, default=0.1)
+    parser.add_argument("--rules", type=int, default=50, help="rules in the history")
+    parser.add_argument("--queries", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--memory-sample",
+        type=int,
+        default=10000,
+        help="operations traced for peak memory per size, 0 to skip",
+    )
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    args = parser.parse_args(argv)
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "results": [],
+    }
+    for size in args.sizes:
+        results = run_size(size, args)
+        # peak memory from a traced run of a smaller sample, timings stay untraced
+        sample = min(size, args.memory_sample)
+        peaks = {}
+        if sample:
+            peaks = {peak["scenario"]: peak for peak in run_size(sample, args, trace_peak)}
+        for result in results:
+            if result["scenario"] in peaks:
+                result["peak_memory_kb"] = peaks[result["scenario"]]["peak_memory_kb"]
+                result["memory_sample"] = sample
+            report["results"].append(result)
+            print(
+                f"{result['scenario']:28} {size:>9}  {result['ops_per_sec']:>12,.0f} ops/s  "
+                f"p50 {result['p50_us']:8.1f}us  p99 {result['p99_us']:8.1f}us"
+            )
+    if args.out:
+        with open(args.out, "w") as out:
+            json.dump(report, out, indent=2)
+    if args.compare:
+        with open(args.compare) as previous:
+            compare(json.load(previous), report)
+    return report
+
+
+if __name__ == "__main__":
+    main()
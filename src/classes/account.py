@@ -1,167 +1,384 @@
-from utils.utils import validate_date
 import calendar
+import sys
+import threading
+from array import array
+from bisect import bisect_right
 from collections import defaultdict
-from classes.transaction import Transaction
+from classes.interest import InterestRuleTimeline
+from classes.ledger import MAX_CENTS, MAX_SEQUENCE, Ledger
+from classes.segment_tree import SegmentTree
+from utils.instrumentation import count, timed
+from utils.interest_engine import rate_segments, sweep_interest
+from utils.parsing import parse_cents, parse_date, parse_type
+
+ACCOUNT_BYTES = 2048  # an empty Account with its ledger, tree, lock and dicts
+ENTRY_BYTES = 100  # one dict entry with int key and value
+MONTH_BYTES = 150  # the [opening, start, end] list of a month checkpoint
+ACCRUAL_BYTES = 100  # the [weights, movement] list of an accrual, weights shared
 
 
 class Account:
     def __init__(self, account):
         self.account = account
-        self.transactions = []  # Transaction[]
-        self.dates_counter = defaultdict(int)
+        self.transactions = Ledger(account)  # Transaction views, sorted by date
+        self.balances = SegmentTree()  # end of day balance in cents, by YYYYMMDD
+        self.dates_counter = defaultdict(int)  # {YYYYMMDD: last sequence used}
+        self.change_dates = array("i")  # date of every accepted transaction, oldest first
+        # {YYYYMM: [tail weights, annualized interest earned by the month's movements]}
+        self.accruals = {}
+        # {YYYYMM: [opening balance in cents, first row, end row]} of months with rows
+        self.months = {}
+        self.month_keys = array("i")  # keys of self.months, sorted
+        # guards txn id allocation and every ledger mutation or multi-step read
+        self.lock = threading.RLock()
+        self.evicted = False  # set once moved to a cold store, see EvictingAccountMap
 
+    @timed("account.add_transaction")
     def add_transaction(self, date_str, account_id, type_str, amount_str):
-        # check if valid date format
-        if not validate_date(date_str):
-            return False, "Invalid date format. Must be YYYYMMDD. \n"
-        type_str = type_str.upper()
-        # check if valid type (D/W)
-        if type_str not in ("D", "W"):
-            return False, "Invalid transaction type. Must be D or W. \n"
-        # check if valid number && amount > 0
-        try:
-            amount = round(float(amount_str), 2)
-            if amount <= 0:
-                return False, "Amount must be greater than zero. \n"
-        except ValueError as e:
-            return False, "Invalid amount. Must be a number. \n"
-        if amount <= 0:
-            return False, "Amount must be greater than zero. \n"
-        # check if first transaction is a withdrawal
-        if len(self.transactions) == 0 and type_str == "W":
-            return False, "First transaction cannot be a withdrawal. \n"
-        # check if withdraw > balance (before date of transaction)
-        if type_str == "W":
-            balance = 0
-            # find balance before date of transaction
-            for txn in self.transactions:
-                if txn.date <= date_str:
-                    if txn.type == "D":
-                        balance += txn.amount
-                    else:
-                        balance -= txn.amount
-            if balance < amount:
-                return False, "Insufficient funds. \n"
-
-        # increment date counter
-        self.dates_counter[date_str] += 1
-        txn_id = f"{date_str}-{self.dates_counter[date_str]:02d}"
-        # create new transaction object
-        transaction = Transaction(account_id, date_str, txn_id, type_str, amount)
-        # add transaction to specified account_id object
-        self.transactions.append(transaction)
-        # sort transactions by date
-        self.transactions.sort(key=lambda txn: txn.date)
+        message, day, type_str, cents = self.validate_transaction(
+            date_str, type_str, amount_str
+        )
+        if message:
+            return False, message
+        with self.lock:
+            # check if first transaction is a withdrawal
+            if len(self.transactions) == 0 and type_str == "W":
+                return False, "First transaction cannot be a withdrawal. \n"
+            # check if withdraw > balance, on the transaction date or any later date
+            if type_str == "W":
+                if not self.has_funds(day, cents):
+                    return False, "Insufficient funds. \n"
+                cents = -cents
+
+            # next txn id of the day, only used up once the row is inserted
+            sequence = self.dates_counter[day] + 1
+            if sequence > MAX_SEQUENCE:
+                return False, "Too many transactions on this date. \n"
+            # insert into the date-ordered ledger, txn id is derived from date + sequence
+            position = self.transactions.insert(day, sequence, cents)
+            self.dates_counter[day] = sequence
+            self.update_months(day // 100, position, cents)
+            self.balances.add(day, SegmentTree.LAST, cents)
+            self.change_dates.append(day)
+            # a backdated insert only earns interest from its own day onwards
+            accrual = self.accruals.get(day // 100)
+            if accrual is not None:
+                accrual[1] += cents * accrual[0][day % 100]
         # return success
         return True, "Transaction added successfully \n"
 
-    def generate_all_statements(self):
-        statement = f"Account: {self.account} \n"
-        statement += "| Date         | Txn Id           | Type | Amount | Balance | \n"
+    def update_months(self, key, position, cents):
+        # a row inserted at position in month key moves every later month's rows
+        # down by one and changes their opening balance; callers hold the lock
+        keys = self.month_keys
+        index = bisect_right(keys, key)
+        if index and keys[index - 1] == key:
+            self.months[key][2] += 1
+        else:
+            self.months[key] = [self.balances.get(key * 100), position, position + 1]
+            keys.insert(index, key)
+            index += 1
+        for later in keys[index:]:
+            checkpoint = self.months[later]
+            checkpoint[0] += cents
+            checkpoint[1] += 1
+            checkpoint[2] += 1
+
+    @timed("account.validate_transaction")
+    def validate_transaction(self, date_str, type_str, amount_str):
+        # returns (error message or None, YYYYMMDD int, type, amount in cents)
+        # check if valid date format
+        day = parse_date(date_str)
+        if day is None:
+            return "Invalid date format. Must be YYYYMMDD. \n", None, None, None
+        # check if valid type (D/W)
+        type_str = parse_type(type_str)
+        if type_str is None:
+            return "Invalid transaction type. Must be D or W. \n", None, None, None
+        # check if valid number with at most 2 decimals && amount > 0
+        cents, message = parse_cents(amount_str)
+        if message:
+            return message, None, None, None
+        if cents <= 0:
+            return "Amount must be greater than zero. \n", None, None, None
+        if cents > MAX_CENTS:
+            return "Amount is too large. \n", None, None, None
+        return None, day, type_str, cents
+
+    @timed("account.has_funds")
+    def has_funds(self, day, cents):
+        # lowest balance from day onward covers a withdrawal of cents
+        return self.balances.min(day, SegmentTree.LAST) >= cents
+
+    def __getstate__(self):
+        # pickled whole (e.g. to and from an ingest worker) without its lock
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+
+    def snapshot(self):
+        # compact, picklable copy of the ledger: (account, dates, amounts, sequences)
+        ledger = self.transactions
+        with self.lock:
+            return (
+                self.account,
+                array("i", ledger.dates),
+                array("q", ledger.amounts),
+                array("I", ledger.sequences),
+            )
+
+    def nbytes(self):
+        # resident size estimate, on the high side so a memory budget holds:
+        # ENTRY_BYTES per dict entry (key and value objects, measured with
+        # tracemalloc) plus the lists held by months and accruals
+        tables = (
+            self.balances.pending,
+            self.balances.low,
+            self.dates_counter,
+            self.months,
+            self.accruals,
+        )
+        return (
+            ACCOUNT_BYTES
+            + self.transactions.nbytes()
+            + self.change_dates.itemsize * len(self.change_dates)
+            + sum(sys.getsizeof(table) + ENTRY_BYTES * len(table) for table in tables)
+            + MONTH_BYTES * len(self.months)
+            + ACCRUAL_BYTES * len(self.accruals)
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot, balances=None):
+        # rebuild an account from snapshot() output without re-validating it;
+        # balances, if given, is the account's SegmentTree and is not rebuilt
+        account_id, dates, amounts, sequences = snapshot
+        account = cls(account_id)
+        ledger = account.transactions
+        ledger.dates = array("i", dates)
+        ledger.amounts = array("q", amounts)
+        ledger.sequences = array("I", sequences)
+        account.change_dates = array("i", dates)
+        daily_totals = defaultdict(int)
+        for day, sequence, cents in zip(dates, sequences, amounts):
+            if sequence > account.dates_counter[day]:
+                account.dates_counter[day] = sequence
+            daily_totals[day] += cents
+        if balances is not None:
+            account.balances = balances
+        else:
+            for day, total in daily_totals.items():
+                account.balances.add(day, SegmentTree.LAST, total)
+        # rows are in date order, so each month is one run of rows
         balance = 0
-        for txn in self.transactions:
-            if txn.type == "D":
-                balance += txn.amount
+        for position, (day, cents) in enumerate(zip(dates, amounts)):
+            key = day // 100
+            checkpoint = account.months.get(key)
+            if checkpoint is None:
+                account.months[key] = [balance, position, position + 1]
+                account.month_keys.append(key)
             else:
-                balance -= txn.amount
-            statement += f"| {txn.date}     | {txn.txn_id}      | {txn.type}    | {txn.amount:.2f}  | {balance:.2f} | \n"
-        return statement
+                checkpoint[2] += 1
+            balance += cents
+        return account
+
+    @timed("account.generate_all_statements")
+    def generate_all_statements(self):
+        return "".join(self.iter_all_statements())
+
+    def iter_all_statements(self, start=0, stop=None):
+        # yield the history statement line by line, rows start..stop only if given
+        ledger = self.transactions
+        with self.lock:
+            start, stop, _ = slice(start, stop).indices(len(ledger))
+            rows = ledger.copy(start, stop)
+            balance = 0
+            if start < stop:
+                # balance before the first row: the previous day's close plus
+                # any earlier rows on the same day
+                first_day = ledger.dates[start]
+                same_day, _ = ledger.range(first_day, first_day)
+                balance = self.balances.get(first_day - 1)
+                balance += sum(ledger.amounts[same_day:start])
+        yield f"Account: {self.account} \n"
+        yield "| Date         | Txn Id           | Type | Amount | Balance | \n"
+        count("statement.transactions_scanned", len(rows))
+        for txn in rows:
+            balance += txn.cents
+            yield f"| {txn.date}     | {txn.txn_id}      | {txn.type}    | {txn.amount:.2f}  | {balance / 100:.2f} | \n"
+
+    @property
+    def version(self):
+        # bumped by every accepted transaction, see change_dates
+        return len(self.change_dates)
 
     def generate_monthly_statement(self, year, month, interest_rules):
-        statement = f"Account: {self.account} \n"
-        statement += "| Date         | Txn Id           | Type | Amount | Balance | \n"
-        initial_balance = self.get_balance_before_date(year, month)
+        return self.build_monthly_statement(year, month, interest_rules)[0]
 
-        # get the transactions in requested month
-        monthly_transactions = self.get_transactions_in_month(year, month)
+    @timed("account.build_monthly_statement")
+    def build_monthly_statement(self, year, month, interest_rules):
+        # returns (statement, interest credited at the end of the month)
+        with self.lock:
+            interest = self.calculate_interest(year, month, interest_rules)
+            statement = "".join(self.iter_monthly_statement(year, month, interest))
+        return statement, interest / 100
+
+    def iter_monthly_statement(self, year, month, interest):
+        # yield the monthly statement line by line, given its interest in cents
+        with self.lock:
+            start, end = self.month_range(year, month)
+            rows = self.transactions.copy(start, end)
+            current_balance = self.opening_balance(year, month)
+        yield f"Account: {self.account} \n"
+        yield "| Date         | Txn Id           | Type | Amount | Balance | \n"
+        count("statement.transactions_scanned", len(rows))
+        for txn in rows:
+            current_balance += txn.cents
+            yield f"| {txn.date}     | {txn.txn_id}      | {txn.type}    | {txn.amount:.2f}  | {current_balance / 100:.2f} | \n"
+        last_day = calendar.monthrange(year, month)[1]
+        yield f"| {year}{month:02}{last_day:02}     |                  | I    | {interest / 100:.2f}  | {(current_balance + interest) / 100:.2f} | \n"
+
+    @timed("account.generate_range_statement")
+    def generate_range_statement(
+        self, start_year, start_month, end_year, end_month, interest_rules
+    ):
+        return "".join(
+            self.iter_range_statement(
+                start_year, start_month, end_year, end_month, interest_rules
+            )
+        )
 
-        current_balance = initial_balance
-        for txn in monthly_transactions:
-            if txn.type == "D":
-                current_balance += txn.amount
+    def iter_range_statement(
+        self, start_year, start_month, end_year, end_month, interest_rules
+    ):
+        # yield each month's statement, interest carried into the next opening balance
+        months = []
+        year, month = start_year, start_month
+        while (year, month) <= (end_year, end_month):
+            months.append((year, month))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        with self.lock:
+            start, end = self.transactions.range(
+                start_year * 10000 + start_month * 100 + 1,
+                end_year * 10000 + end_month * 100 + 99,
+            )
+            rows = self.transactions.copy(start, end)
+            balance = self.opening_balance(start_year, start_month)
+        yield f"Account: {self.account} \n"
+        yield "| Date         | Txn Id           | Type | Amount | Balance | \n"
+        count("statement.transactions_scanned", len(rows))
+        position = 0
+        for year, month in months:
+            last_day = calendar.monthrange(year, month)[1]
+            month_end = year * 10000 + month * 100 + last_day
+            opening_balance = balance
+            days, amounts = [], []
+            while position < len(rows) and rows[position].day <= month_end:
+                txn = rows[position]
+                balance += txn.cents
+                days.append(txn.day % 100)
+                amounts.append(txn.cents)
+                yield f"| {txn.date}     | {txn.txn_id}      | {txn.type}    | {txn.amount:.2f}  | {balance / 100:.2f} | \n"
+                position += 1
+            if isinstance(interest_rules, InterestRuleTimeline):
+                segments = interest_rules.segments_for_month(year, month)
             else:
-                current_balance -= txn.amount
-            statement += f"| {txn.date}     | {txn.txn_id}      | {txn.type}    | {txn.amount:.2f}  | {current_balance:.2f} | \n"
+                segments = rate_segments(interest_rules, year, month)
+            annualized_interest = sweep_interest(
+                opening_balance, days, amounts, segments, last_day
+            )
+            interest = round(annualized_interest / 365)
+            balance += interest
+            yield f"| {year}{month:02}{last_day:02}     |                  | I    | {interest / 100:.2f}  | {balance / 100:.2f} | \n"
 
-        # --- CALCULATE INTEREST ---
-        daily_balance_dict = defaultdict(int)
+    def get_monthly_interest(self, year, month, interest_rules):
+        # interest credited on the last day of the month
+        return self.calculate_interest(year, month, interest_rules) / 100
+
+    @timed("account.calculate_interest")
+    def calculate_interest(self, year, month, interest_rules):
+        # interest in cents credited on the last day of the month
+        if isinstance(interest_rules, InterestRuleTimeline):
+            return self.accrued_interest(year, month, interest_rules)
         last_day = calendar.monthrange(year, month)[1]
+        segments = rate_segments(interest_rules, year, month)
+        with self.lock:
+            days, amounts = self.month_movements(year, month)
+            opening_balance = self.opening_balance(year, month)
+        count("interest.transactions_scanned", len(days))
+        annualized_interest = sweep_interest(
+            opening_balance,
+            days,
+            amounts,
+            segments,
+            last_day,
+        )
+        return round(annualized_interest / 365)
 
-        # reset current balance for interest calculation
-        current_balance = initial_balance
-        # populate the daily_balance_dict dictionary {[key:date_str]:balance}
-        for day in range(1, last_day + 1):
-            date_str = f"{year}{month:02}{day:02}"
-            # filter transaction in current day
-            day_transactions = [
-                txn for txn in monthly_transactions if txn.date == date_str
-            ]
-
-            # get current balance given multiple txn in a day
-            for txn in day_transactions:
-                if txn.type == "D":
-                    current_balance += txn.amount
-                else:
-                    current_balance -= txn.amount
-            daily_balance_dict[date_str] = current_balance
-
-        # array to hold all dates balance rule within the month
-        date_balance_rate_array = []
-        for day in range(1, last_day + 1):
-            date_str = f"{year}{month:02}{day:02}"
-            day_balance = daily_balance_dict.get(date_str, 0)
-            applicable_rate = 0  # initialize rate to be 0 if no rule found before date
-            for rule in reversed(interest_rules):
-                if rule.date <= date_str:
-                    applicable_rate = rule.rate
-                    break
-            date_balance_rate_array.append([date_str, day_balance, applicable_rate])
-
-        annualized_interest = 0
-        curr_count = 1
-        for i in range(1, len(date_balance_rate_array)):
-            # Check if current balance and rate match previous day
-            curr_balance = date_balance_rate_array[i][1]
-            prev_balance = date_balance_rate_array[i - 1][1]
-            curr_rate = date_balance_rate_array[i][2]
-            prev_rate = date_balance_rate_array[i - 1][2]
-
-            if curr_balance == prev_balance and curr_rate == prev_rate:
-                curr_count += 1
+    def accrued_interest(self, year, month, interest_rules):
+        # the month's accrual is kept up to date by add_transaction, and only
+        # rebuilt when the month's rates changed since it was built
+        weights = interest_rules.weights_for_month(year, month)
+        with self.lock:
+            accrual = self.accruals.get(year * 100 + month)
+            if accrual is None or accrual[0] is not weights:
+                days, amounts = self.month_movements(year, month)
+                count("interest.transactions_scanned", len(days))
+                movement = sum(cents * weights[day] for day, cents in zip(days, amounts))
+                accrual = self.accruals[year * 100 + month] = [weights, movement]
             else:
-                # Calculate interest for the streak of identical balance/rate days
-                annualized_interest += curr_count * prev_balance * prev_rate / 100
-                curr_count = 1  # reset count
-
-        annualized_interest += (
-            curr_count
-            * date_balance_rate_array[i - 1][1]
-            * (date_balance_rate_array[i - 1][2])
-            / 100
+                count("interest.accrual_hits")
+            annualized_interest = (
+                self.opening_balance(year, month) * weights[1] + accrual[1]
+            )
+        return round(annualized_interest / 365)
+
+    def month_movements(self, year, month):
+        # (days of month, signed cents) of the month's transactions
+        start, end = self.month_range(year, month)
+        ledger = self.transactions
+        return (
+            [day % 100 for day in ledger.dates[start:end]],
+            ledger.amounts[start:end],
         )
 
-        total_interest = round(annualized_interest / 365, 2)
-        statement += f"| {year}{month:02}{last_day:02}     |                  | I    | {total_interest:.2f}  | {(current_balance + total_interest):.2f} | \n"
-        return statement
+    def month_range(self, year, month):
+        # (first row, end row) of the month in the ledger
+        checkpoint = self.months.get(year * 100 + month)
+        if checkpoint is None:
+            return 0, 0
+        return checkpoint[1], checkpoint[2]
+
+    def balance_as_of(self, date_str):
+        # end of day balance, including every transaction dated on or before date_str
+        return self.balances.get(int(date_str)) / 100
+
+    def min_balance_from(self, date_str):
+        # lowest end of day balance on date_str or any later date
+        return self.balances.min(int(date_str), SegmentTree.LAST) / 100
+
+    def opening_balance(self, year, month):
+        # balance in cents before the month, from its checkpoint if it has rows;
+        # otherwise day 00 of the month sorts before the 1st in the balance tree
+        checkpoint = self.months.get(year * 100 + month)
+        if checkpoint is not None:
+            return checkpoint[0]
+        return self.balances.get(year * 10000 + month * 100)
+
+    def active_between(self, first_day, last_day):
+        # True if the account held or moved money on any day first_day..last_day
+        with self.lock:
+            if self.balances.get(first_day - 1):
+                return True
+            start, end = self.transactions.range(first_day, last_day)
+            return start < end
 
     def get_balance_before_date(self, year, month):
-        balance = 0
-        target_date = f"{year}{month:02}01"
-        for txn in self.transactions:
-            if txn.date < target_date:
-                if txn.type == "D":
-                    balance += txn.amount
-                else:
-                    balance -= txn.amount
-        return balance
+        return self.opening_balance(year, month) / 100
 
     def get_transactions_in_month(self, year, month):
-        start_date = f"{year}{month:02}01"
-        last_day = calendar.monthrange(year, month)[1]
-        end_date = f"{year}{month:02}{last_day}"
-        transactions = []
-        # go through each transaction within current account, and find those within range
-        for txn in self.transactions:
-            if start_date <= txn.date <= end_date:
-                transactions.append(txn)
-        return transactions
+        start, end = self.month_range(year, month)
+        return self.transactions[start:end]
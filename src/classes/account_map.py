@@ -0,0 +1,66 @@
+import threading
+
+
+class AccountMap:
+    """Dict-like {account_id: Account} split into lock-striped shards.
+
+    An account id always maps to the same shard, so threads touching
+    different accounts rarely contend for the same lock. Iteration works on a
+    copy of each shard's keys and is safe while other threads insert.
+    """
+
+    def __init__(self, shards=64):
+        self.shards = [{} for _ in range(shards)]
+        self.locks = [threading.Lock() for _ in range(shards)]
+
+    def shard(self, account_id):
+        return hash(account_id) % len(self.shards)
+
+    def __getitem__(self, account_id):
+        return self.shards[self.shard(account_id)][account_id]
+
+    def __setitem__(self, account_id, account):
+        index = self.shard(account_id)
+        with self.locks[index]:
+            self.shards[index][account_id] = account
+
+    def __delitem__(self, account_id):
+        index = self.shard(account_id)
+        with self.locks[index]:
+            del self.shards[index][account_id]
+
+    def __contains__(self, account_id):
+        return account_id in self.shards[self.shard(account_id)]
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
+
+    def __iter__(self):
+        for index, shard in enumerate(self.shards):
+            with self.locks[index]:
+                account_ids = list(shard)
+            yield from account_ids
+
+    def get(self, account_id, default=None):
+        return self.shards[self.shard(account_id)].get(account_id, default)
+
+    def setdefault(self, account_id, account):
+        # atomically insert account unless the id is taken, returns the stored one
+        index = self.shard(account_id)
+        with self.locks[index]:
+            return self.shards[index].setdefault(account_id, account)
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        for index, shard in enumerate(self.shards):
+            with self.locks[index]:
+                accounts = list(shard.values())
+            yield from accounts
+
+    def items(self):
+        for index, shard in enumerate(self.shards):
+            with self.locks[index]:
+                items = list(shard.items())
+            yield from items
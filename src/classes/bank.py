@@ -1,14 +1,43 @@
-from utils.utils import validate_date
-from classes.interest import Interest
+from classes.interest import Interest, InterestRuleTimeline
 from classes.account import Account
-from classes.transaction import Transaction
-import datetime
+from classes.account_map import AccountMap
+from classes.cold_store import ColdAccountStore, EvictingAccountMap
+from classes.ingest import IngestReport
+from classes.recompute import RecomputeReport
+from classes.statement_cache import StatementCache
+from utils.interest_engine import batch_interest
+from utils.parsing import parse_date, parse_year_month
+from utils.render import write_lines
+from utils import instrumentation
+from utils.instrumentation import timed
+import calendar
+import threading
 
 
 class Bank:
-    def __init__(self):
-        self.accounts = {}  # {account_id: Account}
-        self.interest_rules = []  # Interest[]
+    def __init__(self, echo_tail=None, memory_budget=None, cold_path=None):
+        self.accounts = AccountMap()  # {account_id: Account}, lock-striped
+        if memory_budget is not None:
+            # keep about memory_budget bytes of accounts resident, the rest on
+            # disk; without cold_path in a temporary file removed by close()
+            self.accounts = EvictingAccountMap(
+                ColdAccountStore(cold_path), memory_budget
+            )
+        self.interest_rules = InterestRuleTimeline()  # Interest[] sorted by date
+        self.statement_cache = StatementCache()
+        # rows echoed after each transaction input, None for the full history
+        self.echo_tail = echo_tail
+        self.store = None  # BankStore journaling accepted input, if any
+        # {(year, month): {account_id: interest}} from compute_month_interest,
+        # kept up to date when a rule changes retroactively; an account's
+        # results are dropped from the month of each new transaction onwards
+        self.interest_results = {}
+        self.interest_lock = threading.Lock()  # guards interest_results, taken last
+        self.last_recompute = None  # RecomputeReport of the latest rule change
+
+    def close(self):
+        if isinstance(self.accounts, EvictingAccountMap):
+            self.accounts.store.close()
 
     def run(self):
         while True:
@@ -16,6 +45,7 @@ class Bank:
             print("[T] Input transactions")
             print("[I] Define interest rules")
             print("[P] Print statement")
+            print("[S] Stats")
             print("[Q] Quit")
             choice = input("> ").strip().upper()
 
@@ -25,6 +55,8 @@ class Bank:
                 self.input_interest()
             elif choice == "P":
                 self.print_monthly_statement()
+            elif choice == "S":
+                self.print_stats()
             elif choice == "Q":
                 print("Thank you for banking with AwesomeGIC Bank.")
                 print("Have a nice day!")
@@ -32,6 +64,15 @@ class Bank:
             else:
                 print("Invalid choice. Please try again. \n")
 
+    def print_stats(self):
+        if instrumentation.enabled:
+            print(instrumentation.format_stats())
+        else:
+            print("Timers are off, start with --instrument to collect them.")
+        if isinstance(self.accounts, EvictingAccountMap):
+            print(f"Accounts: {self.accounts.stats()}")
+        print(f"Statement cache: {self.statement_cache.stats()} \n")
+
     def input_transactions(self):
         while True:
             details = input(
@@ -43,18 +84,78 @@ class Bank:
             if len(parts) != 4:  # validate  input of 4 elements
                 print("Invalid input. Must be <Date> <Account> <Type> <Amount>.")
                 continue
-            date_str, account_id, type_str, amount_str = details.split()
-            # validate current account exists in bank, else create new one
-            if account_id not in self.accounts:
-                self.accounts[account_id] = Account(account_id)
-            success, message = self.accounts[account_id].add_transaction(
+            date_str, account_id, type_str, amount_str = parts
+            success, message = self.add_transaction(
                 date_str, account_id, type_str, amount_str
             )
             if success:
-                print(self.accounts[account_id].generate_all_statements())
+                account = self.accounts[account_id]
+                start = 0
+                if self.echo_tail is not None:
+                    start = max(len(account.transactions) - self.echo_tail, 0)
+                write_lines(account.iter_all_statements(start))
+                print()
             else:
                 print(f"Error: {message}")
 
+    @timed("bank.add_transaction")
+    def add_transaction(self, date_str, account_id, type_str, amount_str):
+        # create the account on its first successful transaction only
+        account = self.accounts.get(account_id)
+        if account is None:
+            account = Account(account_id)
+            # hold the new account's lock until its first entry is journaled
+            with account.lock:
+                success, message = account.add_transaction(
+                    date_str, account_id, type_str, amount_str
+                )
+                if not success:
+                    return success, message
+                stored = self.accounts.setdefault(account_id, account)
+                if stored is account:
+                    self.record_transaction(date_str, account_id, type_str, amount_str)
+            if stored is account:
+                self.forget_interest(account_id, date_str)
+                self.checkpoint()
+                return success, message
+            # another thread created the account first, apply it there instead
+            account = stored
+        # journal under the account lock so replay sees the same per-account order
+        while True:
+            with account.lock:
+                if account.evicted:
+                    # moved to the cold store meanwhile, fault it back in
+                    account = self.accounts[account_id]
+                    continue
+                success, message = account.add_transaction(
+                    date_str, account_id, type_str, amount_str
+                )
+                if success:
+                    self.record_transaction(date_str, account_id, type_str, amount_str)
+            break
+        if success:
+            self.forget_interest(account_id, date_str)
+            self.checkpoint()
+        return success, message
+
+    def forget_interest(self, account_id, date_str):
+        # a transaction changes the account's interest for its month and every
+        # later one, drop those stored results until they are computed again
+        changed_month = int(date_str) // 100
+        with self.interest_lock:
+            for (year, month), results in self.interest_results.items():
+                if year * 100 + month >= changed_month:
+                    results.pop(account_id, None)
+
+    def record_transaction(self, date_str, account_id, type_str, amount_str):
+        if self.store is not None:
+            self.store.record_transaction(date_str, account_id, type_str, amount_str)
+
+    def checkpoint(self):
+        # snapshot when due, outside of any account lock
+        if self.store is not None:
+            self.store.maybe_checkpoint(self)
+
     def print_monthly_statement(self):
         while True:
             details = input(
@@ -62,24 +163,44 @@ class Bank:
             ).strip()
             if not details:
                 break
-            account, year_month_str = details.split(" ")
-            try:
-                # validate correct year_month_str input
-                if not datetime.datetime.strptime(year_month_str, "%Y%m"):
-                    print("\nInvalid date format. Must be YYYYMM")
-                    continue
-                year = int(year_month_str[:4])
-                month = int(year_month_str[4:6])
-            except ValueError as e:
-                print(f"Invalid input: {e}")
-            try:
-                print(
-                    self.accounts[account].generate_monthly_statement(
-                        year, month, self.interest_rules
-                    )
-                )
-            except KeyError as e:
-                print(f"Account {account} not found")
+            parts = details.split()
+            if len(parts) != 2:
+                print("Invalid input. Must be <Account> <Year><Month>.")
+                continue
+            account_id, year_month_str = parts
+            if "-" in year_month_str:
+                self.print_range_statement(account_id, year_month_str)
+                continue
+            year_month = parse_year_month(year_month_str)
+            if year_month is None:
+                print("\nInvalid date format. Must be YYYYMM")
+                continue
+            if account_id not in self.accounts:
+                print(f"Account {account_id} not found")
+                continue
+            statement, _ = self.statement_cache.get(
+                self.accounts[account_id], *year_month, self.interest_rules
+            )
+            print(statement)
+
+    def print_range_statement(self, account_id, range_str):
+        # <Year><Month>-<Year><Month>, interest is carried from month to month
+        start_str, _, end_str = range_str.partition("-")
+        start, end = parse_year_month(start_str), parse_year_month(end_str)
+        if start is None or end is None:
+            print("\nInvalid date format. Must be YYYYMM-YYYYMM")
+            return
+        if end < start:
+            print("\nInvalid range. End month must not be before start month")
+            return
+        if account_id not in self.accounts:
+            print(f"Account {account_id} not found")
+            return
+        print(
+            self.accounts[account_id].generate_range_statement(
+                *start, *end, self.interest_rules
+            )
+        )
 
     def input_interest(self):
         while True:
@@ -93,23 +214,135 @@ class Bank:
                 print("Invalid input. Must be <Date> <RuleId> <Rate in %>.")
                 continue
             date_str, ruleId, rate_str = parts
-            # validate date
-            if not validate_date(date_str):
-                print("\nInvalid date format. Must be YYYYMMDD")
-                continue
-            # validate rate_str is valid
-            try:
-                rate = float(rate_str)
-                if not (0 < rate < 100):
-                    print("Rate must be between 0 and 100.")
-                    continue
-            except ValueError:
-                print("Invalid rate, enter a value between 0 and 100.")
+            success, message = self.add_interest_rule(date_str, ruleId, rate_str)
+            if not success:
+                print(message)
                 continue
-            self.interest_rules = [r for r in self.interest_rules if r.date != date_str]
-            self.interest_rules.append(Interest(date_str, ruleId, rate))
-            self.interest_rules.sort(key=lambda r: r.date)
             print("Interest Rules \n")
             print("| Date     | RuleId | Rate (%) |")
             for r in self.interest_rules:
                 print(r)
+            if self.last_recompute is not None and self.last_recompute.months:
+                print(self.last_recompute.summary())
+                print(self.last_recompute.format_changes())
+
+    @timed("bank.add_interest_rule")
+    def add_interest_rule(self, date_str, ruleId, rate_str):
+        # validate date
+        if parse_date(date_str) is None:
+            return False, "\nInvalid date format. Must be YYYYMMDD"
+        # validate rate_str is valid
+        try:
+            rate = float(rate_str)
+            if not (0 < rate < 100):
+                return False, "Rate must be between 0 and 100."
+        except ValueError:
+            return False, "Invalid rate, enter a value between 0 and 100."
+        with self.interest_rules.lock:
+            self.interest_rules.upsert(Interest(date_str, ruleId, rate))
+            window_end = self.interest_rules.next_rule_date(date_str)
+            if self.store is not None:
+                self.store.record_rule(date_str, ruleId, rate_str)
+        self.checkpoint()
+        self.last_recompute = None
+        with self.interest_lock:
+            stored = bool(self.interest_results)
+        if stored:
+            self.last_recompute = self.recompute_interest(date_str, window_end)
+        return True, "Interest rule added successfully"
+
+    @timed("bank.recompute_interest")
+    def recompute_interest(self, date_str, window_end=None):
+        """Refresh the stored month-end interest after the rule dated date_str
+        changed. The rule only sets the rate from date_str up to window_end (the
+        next rule), so only the stored months overlapping that window are
+        visited, and in them only accounts that held or moved money in it."""
+        first_day = int(date_str)
+        end_day = int(window_end) if window_end else 100000000  # after any date
+        report = RecomputeReport(date_str, window_end)
+        with self.interest_lock:
+            stored = sorted(self.interest_results.items())
+        for (year, month), results in stored:
+            month_start = year * 10000 + month * 100 + 1
+            month_end = month_start + calendar.monthrange(year, month)[1] - 1
+            if month_end < first_day or month_start >= end_day:
+                continue
+            report.months.append((year, month))
+            low, high = max(first_day, month_start), min(end_day - 1, month_end)
+            with self.interest_lock:
+                entries = list(results.items())
+            for account_id, interest in entries:
+                report.accounts_checked += 1
+                account = self.accounts.get(account_id)
+                if account is None or not account.active_between(low, high):
+                    continue
+                report.recomputed += 1
+                new_interest = account.get_monthly_interest(
+                    year, month, self.interest_rules
+                )
+                if new_interest == interest:
+                    continue
+                with self.interest_lock:
+                    # a transaction meanwhile dropped it, leave it dropped
+                    if account_id not in results:
+                        continue
+                    results[account_id] = new_interest
+                report.changes.append(
+                    (year, month, account_id, interest, new_interest)
+                )
+        return report
+
+    @timed("bank.compute_month_interest")
+    def compute_month_interest(self, year, month):
+        """Interest credited at the end of the month for every account,
+        {account_id: interest}, computed in one batch."""
+        last_day = calendar.monthrange(year, month)[1]
+        account_ids = list(self.accounts)
+        opening_balances = []
+        movements = []
+        for account_id in account_ids:
+            account = self.accounts[account_id]
+            with account.lock:
+                opening_balances.append(account.opening_balance(year, month))
+                movements.append(account.month_movements(year, month))
+        annualized = batch_interest(
+            opening_balances,
+            movements,
+            self.interest_rules.segments_for_month(year, month),
+            last_day,
+        )
+        results = {
+            account_id: round(interest / 365) / 100
+            for account_id, interest in zip(account_ids, annualized)
+        }
+        with self.interest_lock:
+            self.interest_results[(year, month)] = dict(results)
+        return results
+
+    @timed("bank.ingest_stream")
+    def ingest_stream(self, lines, kind="T", source="<stream>"):
+        """Bulk-load transaction ("T") or interest rule ("I") lines without
+        echoing statements. Returns an IngestReport with the rejected lines."""
+        if kind == "T":
+            expected, add = 4, self.add_transaction
+            usage = "Invalid input. Must be <Date> <Account> <Type> <Amount>."
+        elif kind == "I":
+            expected, add = 3, self.add_interest_rule
+            usage = "Invalid input. Must be <Date> <RuleId> <Rate in %>."
+        else:
+            raise ValueError(f"Unknown ingest kind: {kind}")
+        report = IngestReport(source)
+        for line_no, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            parts = line.split()
+            if len(parts) != expected:
+                report.reject(line_no, line, usage)
+                continue
+            success, message = add(*parts)
+            if success:
+                report.accept()
+            else:
+                report.reject(line_no, line, message)
+        return report.finish()
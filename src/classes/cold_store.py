@@ -0,0 +1,257 @@
+import os
+import struct
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+from classes.account import Account
+from classes.account_map import AccountMap
+from classes.segment_tree import SegmentTree
+from utils.instrumentation import count, timed
+
+# account id length, row count, pending node count, low node count
+RECORD_HEADER = struct.Struct("<HQII")
+COLD = object()  # AccountMap value of an account that lives in the cold store
+
+
+class ColdAccountStore:
+    """Packed segment file holding evicted accounts.
+
+    Each eviction appends one record: the ledger columns and the balance
+    tree's nodes, so faulting an account back in is a few frombytes calls
+    rather than a replay. An index maps every account id to its latest
+    record; superseded records are dead space until compact() rewrites the
+    file. The store is a cache of accounts held in memory elsewhere (or in the
+    journal), so it starts empty every time.
+    """
+
+    def __init__(self, path=None):
+        # without a path the store is a temporary file, removed by close()
+        self.temporary = path is None
+        if self.temporary:
+            descriptor, path = tempfile.mkstemp(suffix=".seg", prefix="accounts-")
+            os.close(descriptor)
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(path, "w+b")
+        self.index = {}  # {account_id: (offset, length, account version)}
+        self.live_bytes = 0
+        self.lock = threading.Lock()  # guards the file and index
+
+    def __contains__(self, account_id):
+        return account_id in self.index
+
+    def save(self, account):
+        # callers hold the account lock; an unchanged account keeps its record
+        record = self.index.get(account.account)
+        if record is not None and record[2] == account.version:
+            return
+        account_id, dates, amounts, sequences = account.snapshot()
+        tree = account.balances
+        account_id = account_id.encode()
+        data = b"".join(
+            [
+                RECORD_HEADER.pack(
+                    len(account_id), len(dates), len(tree.pending), len(tree.low)
+                ),
+                account_id,
+                dates.tobytes(),
+                amounts.tobytes(),
+                sequences.tobytes(),
+                array("q", tree.pending.keys()).tobytes(),
+                array("q", tree.pending.values()).tobytes(),
+                array("q", tree.low.keys()).tobytes(),
+                array("q", tree.low.values()).tobytes(),
+            ]
+        )
+        with self.lock:
+            offset = self.file.seek(0, os.SEEK_END)
+            self.file.write(data)
+            self.drop(account.account)
+            self.index[account.account] = (offset, len(data), account.version)
+            self.live_bytes += len(data)
+
+    def load(self, account_id):
+        with self.lock:
+            offset, length, _ = self.index[account_id]
+            self.file.seek(offset)
+            data = self.file.read(length)
+        id_length, rows, pending_count, low_count = RECORD_HEADER.unpack_from(data)
+        position = RECORD_HEADER.size + id_length
+        columns = []
+        for typecode, size in (("i", rows), ("q", rows), ("I", rows)) + (
+            ("q", pending_count),
+            ("q", pending_count),
+            ("q", low_count),
+            ("q", low_count),
+        ):
+            column = array(typecode)
+            end = position + size * column.itemsize
+            column.frombytes(data[position:end])
+            position = end
+            columns.append(column)
+        dates, amounts, sequences, pending_keys, pending, low_keys, low = columns
+        balances = SegmentTree()
+        balances.pending = dict(zip(pending_keys, pending))
+        balances.low = dict(zip(low_keys, low))
+        return Account.from_snapshot(
+            (account_id, dates, amounts, sequences), balances
+        )
+
+    def drop(self, account_id):
+        record = self.index.pop(account_id, None)
+        if record is not None:
+            self.live_bytes -= record[1]
+
+    def compact(self):
+        # rewrite only the live records once dead space outweighs them
+        with self.lock:
+            size = self.file.seek(0, os.SEEK_END)
+            if size - self.live_bytes <= max(self.live_bytes, 1 << 20):
+                return False
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w+b") as out:
+                index = {}
+                for account_id, (offset, length, version) in self.index.items():
+                    self.file.seek(offset)
+                    index[account_id] = (out.tell(), length, version)
+                    out.write(self.file.read(length))
+            self.file.close()
+            os.replace(temp_path, self.path)
+            self.file = open(self.path, "r+b")
+            self.index = index
+            return True
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+            if self.temporary and os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class EvictingAccountMap(AccountMap):
+    """AccountMap that keeps the estimated size of resident accounts under
+    budget bytes by evicting the least recently used ones to a
+    ColdAccountStore. Looking up an evicted account faults it back in.
+
+    An account is only evicted when no other thread holds its lock, and it is
+    marked evicted under that lock, so a writer that raced with the eviction
+    sees the flag and looks the account up again.
+    """
+
+    def __init__(self, store, budget, shards=64):
+        super().__init__(shards)
+        self.store = store
+        self.budget = budget
+        self.hot = OrderedDict()  # {account_id: estimated bytes}, least recent first
+        self.resident_bytes = 0
+        self.evictions = 0
+        self.fault_ins = 0
+        self.lru_lock = threading.Lock()  # guards hot and the counters
+
+    def __getitem__(self, account_id):
+        account = self.get(account_id, COLD)
+        if account is COLD:
+            raise KeyError(account_id)
+        return account
+
+    def __setitem__(self, account_id, account):
+        super().__setitem__(account_id, account)
+        self.touch(account)
+
+    def __delitem__(self, account_id):
+        super().__delitem__(account_id)
+        with self.lru_lock:
+            self.resident_bytes -= self.hot.pop(account_id, 0)
+        self.store.drop(account_id)
+
+    def get(self, account_id, default=None):
+        index = self.shard(account_id)
+        with self.locks[index]:
+            account = self.shards[index].get(account_id, default)
+            if account is COLD:
+                account = self.fault_in(account_id)
+                self.shards[index][account_id] = account
+        if isinstance(account, Account):
+            self.touch(account)
+        return account
+
+    def setdefault(self, account_id, account):
+        stored = super().setdefault(account_id, account)
+        if stored is COLD:
+            stored = self.get(account_id)
+        else:
+            self.touch(stored)
+        return stored
+
+    def values(self):
+        for account_id in self:
+            account = self.get(account_id)
+            if account is not None:
+                yield account
+
+    def items(self):
+        for account_id in self:
+            account = self.get(account_id)
+            if account is not None:
+                yield account_id, account
+
+    @timed("accounts.fault_in")
+    def fault_in(self, account_id):
+        # called with the shard lock held
+        with self.lru_lock:
+            self.fault_ins += 1
+        count("accounts.fault_ins")
+        return self.store.load(account_id)
+
+    def touch(self, account):
+        # mark account most recently used, then evict down to the budget
+        size = account.nbytes()
+        with self.lru_lock:
+            self.resident_bytes += size - self.hot.pop(account.account, 0)
+            self.hot[account.account] = size
+            victims = []
+            while self.resident_bytes > self.budget and len(self.hot) > 1:
+                account_id, size = self.hot.popitem(last=False)
+                self.resident_bytes -= size
+                victims.append((account_id, size))
+        for account_id, size in victims:
+            if not self.evict(account_id):
+                # in use, keep it resident
+                with self.lru_lock:
+                    self.hot[account_id] = size
+                    self.hot.move_to_end(account_id, last=False)
+                    self.resident_bytes += size
+        if victims:
+            self.store.compact()
+
+    @timed("accounts.evict")
+    def evict(self, account_id):
+        index = self.shard(account_id)
+        with self.locks[index]:
+            account = self.shards[index].get(account_id)
+            if not isinstance(account, Account):
+                return True  # deleted or already cold
+            if not account.lock.acquire(blocking=False):
+                return False
+            try:
+                self.store.save(account)
+                account.evicted = True
+                self.shards[index][account_id] = COLD
+            finally:
+                account.lock.release()
+            with self.lru_lock:
+                self.evictions += 1
+        count("accounts.evictions")
+        return True
+
+    def stats(self):
+        with self.lru_lock:
+            return {
+                "resident": len(self.hot),
+                "resident_bytes": self.resident_bytes,
+                "budget": self.budget,
+                "cold": len(self) - len(self.hot),
+                "evictions": self.evictions,
+                "fault_ins": self.fault_ins,
+            }
@@ -0,0 +1,42 @@
+import time
+
+
+class IngestReport:
+    def __init__(self, source="<stream>"):
+        self.source = source
+        self.lines_read = 0
+        self.accepted = 0
+        self.rejects = []  # [(line_no, line, message)]
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def accept(self, count=1):
+        self.lines_read += count
+        self.accepted += count
+
+    def reject(self, line_no, line, message):
+        self.lines_read += 1
+        self.rejects.append((line_no, line, message.strip()))
+
+    def finish(self):
+        self.finished = time.perf_counter()
+        return self
+
+    @property
+    def elapsed(self):
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    def format_rejects(self):
+        return "".join(
+            f"{self.source}:{line_no}: {message} [{line}]\n"
+            for line_no, line, message in self.rejects
+        )
+
+    def summary(self):
+        elapsed = self.elapsed
+        rate = self.lines_read / elapsed if elapsed > 0 else 0
+        return (
+            f"{self.source}: {self.lines_read} lines, {self.accepted} accepted, "
+            f"{len(self.rejects)} rejected in {elapsed:.3f}s ({rate:,.0f} lines/s)"
+        )
@@ -1,3 +1,10 @@
+import calendar
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from utils.interest_engine import rate_segments, tail_weights
+
+
 class Interest:
     def __init__(self, date, ruleId, rate):
         self.date = date
@@ -6,3 +13,92 @@ class Interest:
 
     def __str__(self):
         return f"| {self.date} | {self.ruleId} | {self.rate:.2f}     |"
+
+
+class InterestRuleTimeline:
+    """Interest rules kept sorted by date in parallel arrays.
+
+    Behaves like a read-only list of Interest objects ordered by date. The rate
+    segments of a month are cached and shared by every account's statement,
+    and are only dropped when a rule dated in or before that month changes.
+    """
+
+    def __init__(self):
+        self.dates = []  # str[], sorted
+        self.rates = []  # float[], rate for each entry in self.dates
+        self.rules = []  # Interest[], rule for each entry in self.dates
+        self.month_segments = {}  # {(year, month): ((first_day, rate), ...)}
+        self.month_weights = {}  # {(year, month): tail_weights of the month}
+        self.change_dates = array("i")  # date of every upserted rule, oldest first
+        self.lock = threading.RLock()  # guards upserts against concurrent reads
+
+    @property
+    def version(self):
+        # bumped by every upsert, see change_dates
+        return len(self.change_dates)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def __iter__(self):
+        return iter(self.rules)
+
+    def __getitem__(self, index):
+        return self.rules[index]
+
+    def upsert(self, rule):
+        with self.lock:
+            self._upsert(rule)
+
+    def _upsert(self, rule):
+        # a new rule replaces any existing rule on the same day
+        position = bisect_left(self.dates, rule.date)
+        if position < len(self.dates) and self.dates[position] == rule.date:
+            self.rates[position] = rule.rate
+            self.rules[position] = rule
+        else:
+            self.dates.insert(position, rule.date)
+            self.rates.insert(position, rule.rate)
+            self.rules.insert(position, rule)
+        self.change_dates.append(int(rule.date))
+        # only months on or after the rule's month can see the change
+        changed_month = (int(rule.date[:4]), int(rule.date[4:6]))
+        for key in [key for key in self.month_segments if key >= changed_month]:
+            del self.month_segments[key]
+        for key in [key for key in self.month_weights if key >= changed_month]:
+            del self.month_weights[key]
+
+    def rate_at(self, date_str):
+        # rate in force on date_str, 0 if no rule has started yet
+        with self.lock:
+            position = bisect_right(self.dates, date_str)
+            return self.rates[position - 1] if position else 0
+
+    def next_rule_date(self, date_str):
+        # date of the first rule after date_str, None if there is none
+        with self.lock:
+            position = bisect_right(self.dates, date_str)
+            return self.dates[position] if position < len(self.dates) else None
+
+    def segments_for_month(self, year, month):
+        segments = self.month_segments.get((year, month))
+        if segments is None:
+            with self.lock:
+                segments = tuple(rate_segments(self.rules, year, month))
+                self.month_segments[(year, month)] = segments
+        return segments
+
+    def weights_for_month(self, year, month):
+        # a new tuple after every change to the month's rates, so accounts can
+        # tell whether an accrual built from an older one is stale
+        weights = self.month_weights.get((year, month))
+        if weights is None:
+            with self.lock:
+                weights = self.month_weights.get((year, month))
+                if weights is None:
+                    last_day = calendar.monthrange(year, month)[1]
+                    weights = tail_weights(
+                        self.segments_for_month(year, month), last_day
+                    )
+                    self.month_weights[(year, month)] = weights
+        return weights
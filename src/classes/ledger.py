@@ -0,0 +1,83 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from classes.transaction import Transaction
+from utils.instrumentation import timed
+
+MAX_CENTS = (1 << 63) - 1  # largest amount an array('q') row can hold
+MAX_SEQUENCE = (1 << 32) - 1  # largest sequence an array('I') row can hold
+
+
+class Ledger:
+    """Columnar, date-ordered storage for one account's transactions.
+
+    Each row costs 16 bytes: an array('i') of YYYYMMDD dates, an array('q') of
+    signed amounts in cents (withdrawals negative, so the type is the sign) and
+    an array('I') of per-day sequence numbers from which txn ids are derived.
+    Indexing and iterating yield Transaction views.
+    """
+
+    def __init__(self, account):
+        self.account = account
+        self.dates = array("i")
+        self.amounts = array("q")
+        self.sequences = array("I")
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.row(i) for i in range(*index.indices(len(self.dates)))]
+        if index < 0:
+            index += len(self.dates)
+        return self.row(index)
+
+    def __iter__(self):
+        return self.iter_rows()
+
+    def iter_rows(self, start=0, stop=None):
+        # yield views of rows start..stop without copying the columns
+        account, dates, sequences, amounts = (
+            self.account,
+            self.dates,
+            self.sequences,
+            self.amounts,
+        )
+        stop = len(dates) if stop is None else stop
+        for index in range(start, stop):
+            yield Transaction(account, dates[index], sequences[index], amounts[index])
+
+    def row(self, index):
+        return Transaction(
+            self.account, self.dates[index], self.sequences[index], self.amounts[index]
+        )
+
+    def copy(self, start=0, stop=None):
+        # compact copy of rows start..stop, e.g. to render outside a lock
+        rows = Ledger(self.account)
+        rows.dates = self.dates[start:stop]
+        rows.amounts = self.amounts[start:stop]
+        rows.sequences = self.sequences[start:stop]
+        return rows
+
+    @timed("ledger.insert")
+    def insert(self, day, sequence, cents):
+        # after any rows on the same date, so same-day rows keep their order;
+        # values are checked first so a failed insert leaves every column intact
+        if not -MAX_CENTS <= cents <= MAX_CENTS or not 0 < sequence <= MAX_SEQUENCE:
+            raise OverflowError(f"Row {day} {sequence} {cents} does not fit the ledger")
+        position = bisect_right(self.dates, day)
+        self.dates.insert(position, day)
+        self.amounts.insert(position, cents)
+        self.sequences.insert(position, sequence)
+        return position
+
+    def range(self, first_day, last_day):
+        # (start, end) positions of the rows dated first_day..last_day
+        return bisect_left(self.dates, first_day), bisect_right(self.dates, last_day)
+
+    def nbytes(self):
+        return sum(
+            len(column) * column.itemsize
+            for column in (self.dates, self.amounts, self.sequences)
+        )
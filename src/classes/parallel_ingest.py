@@ -0,0 +1,194 @@
+import multiprocessing
+import os
+import zlib
+from itertools import islice
+from classes.account import Account
+from classes.account_map import AccountMap
+from classes.ingest import IngestReport
+from utils.instrumentation import timed
+
+USAGE = "Invalid input. Must be <Date> <Account> <Type> <Amount>."
+
+
+@timed("ingest.parallel")
+def ingest_parallel(bank, lines, workers=None, source="<stream>", batch_size=500000):
+    """Bulk-load transaction lines into bank using worker processes.
+
+    The reader hands each line to the worker owning its account
+    (crc32(account) % workers), so every account is only ever written by one
+    process and keeps its line order. Workers live for the whole ingest and
+    keep their accounts between batches; a ledger the bank already holds is
+    sent to its worker once, the first time its id shows up. Lines are read
+    batch_size at a time so the input never has to fit in memory. After each
+    batch the accepted lines are journaled and the rejected lines reported,
+    both in input order. The accounts are merged into the bank once, at the
+    end. Nothing else may write to the bank meanwhile.
+    """
+    workers = workers or os.cpu_count() or 1
+    report = IngestReport(source)
+    lines = iter(lines)
+    line_no = 0
+    shipped = set()  # ids of bank accounts already sent to their worker
+    pool = [LocalWorker()] if workers == 1 else []
+    try:
+        while len(pool) < workers:
+            pool.append(WorkerProcess())
+        while True:
+            batch = list(islice(lines, batch_size))
+            if not batch:
+                break
+            partitions = [[] for _ in range(workers)]
+            rejects = []
+            for line in batch:
+                line_no += 1
+                line = line.strip()
+                if not line:
+                    continue
+                parts = line.split()
+                if len(parts) != 4:
+                    rejects.append((line_no, line, USAGE))
+                    continue
+                partitions[zlib.crc32(parts[1].encode()) % workers].append(
+                    (line_no, line)
+                )
+            # send every job before waiting on any, so the workers overlap
+            for worker, rows in zip(pool, partitions):
+                worker.send((rows, existing_accounts(bank, rows, shipped)))
+            accepted = []
+            for worker in pool:
+                accepted_lines, rejected = worker.receive()
+                accepted.extend(accepted_lines)
+                rejects.extend(rejected)
+            if bank.store is not None:
+                # journal in input order, the order each account applied them in
+                by_line = dict(row for rows in partitions for row in rows)
+                for accepted_line in sorted(accepted):
+                    bank.store.record_transaction(*by_line[accepted_line].split())
+            report.accept(len(accepted))
+            for reject in sorted(rejects):
+                report.reject(*reject)
+        for worker in pool:
+            worker.send(None)
+        for worker in pool:
+            for account, first_date in worker.receive():
+                bank.accounts[account.account] = account
+                bank.forget_interest(account.account, first_date)
+    finally:
+        for worker in pool:
+            worker.close()
+    # only now does the bank hold what the journal says, so a snapshot is safe
+    bank.checkpoint()
+    return report.finish()
+
+
+def existing_accounts(bank, rows, shipped):
+    # accounts in rows that the bank holds and their worker does not have yet
+    accounts = []
+    for account_id in {line.split()[1] for _, line in rows}:
+        if account_id not in shipped and account_id in bank.accounts:
+            shipped.add(account_id)
+            accounts.append(bank.accounts[account_id])
+    return accounts
+
+
+class Partition:
+    """The accounts owned by one worker, kept from batch to batch."""
+
+    def __init__(self):
+        self.accounts = AccountMap()
+        self.touched = {}  # {account_id: earliest accepted date}
+
+    def apply(self, rows, existing):
+        # apply one batch's lines and return (accepted line numbers, rejected lines)
+        for account in existing:
+            self.accounts[account.account] = account
+        accepted, rejects = [], []
+        for line_no, line in rows:
+            date_str, account_id, type_str, amount_str = line.split()
+            account = self.accounts.get(account_id)
+            if account is None:
+                account = Account(account_id)
+            success, message = account.add_transaction(
+                date_str, account_id, type_str, amount_str
+            )
+            if success:
+                # an account only exists once a transaction was accepted
+                self.accounts.setdefault(account_id, account)
+                first_date = self.touched.get(account_id, date_str)
+                self.touched[account_id] = min(first_date, date_str)
+                accepted.append(line_no)
+            else:
+                rejects.append((line_no, line, message))
+        return accepted, rejects
+
+    def finish(self):
+        # the accounts written to, each with its earliest accepted date
+        return [
+            (self.accounts[account_id], first_date)
+            for account_id, first_date in self.touched.items()
+        ]
+
+
+def serve_partition(connection):
+    # runs in a worker process: one Partition for the whole ingest; a job is
+    # (rows, existing accounts) and None asks for the touched accounts
+    partition = Partition()
+    while True:
+        try:
+            job = connection.recv()
+        except EOFError:
+            break  # the reader gave up, e.g. another worker failed
+        try:
+            result = partition.finish() if job is None else partition.apply(*job)
+        except Exception as error:
+            result = error
+        connection.send(result)
+        if job is None or isinstance(result, Exception):
+            break
+    connection.close()
+
+
+class WorkerProcess:
+    # a Partition in a long-lived process, fed over a pipe
+    def __init__(self):
+        self.connection, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=serve_partition, args=(child,), daemon=True
+        )
+        self.process.start()
+        child.close()
+
+    def send(self, job):
+        self.connection.send(job)
+
+    def receive(self):
+        result = self.connection.recv()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def close(self):
+        self.connection.close()
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+
+
+class LocalWorker:
+    # the same interface run in this process, for workers=1
+    def __init__(self):
+        self.partition = Partition()
+        self.result = None
+
+    def send(self, job):
+        if job is None:
+            self.result = self.partition.finish()
+        else:
+            self.result = self.partition.apply(*job)
+
+    def receive(self):
+        return self.result
+
+    def close(self):
+        pass
@@ -0,0 +1,244 @@
+import mmap
+import os
+import struct
+import threading
+from array import array
+from classes.account import Account
+from classes.ingest import IngestReport
+from classes.interest import Interest
+
+SNAPSHOT_MAGIC = b"BANKSNP3"
+# magic, journal offset covered by the rules, rule count, account count
+SNAPSHOT_HEADER = struct.Struct("<8sqII")
+RULE_HEADER = struct.Struct("<idH")  # date, rate, rule id length
+# account id length, row count, journal offset covered by the ledger
+ACCOUNT_HEADER = struct.Struct("<HQq")
+
+
+class BankStore:
+    """File-based persistence for a Bank, no database required.
+
+    Accepted transactions and rules are appended to a journal that is fsynced
+    every sync_every records. Every snapshot_every records the whole bank is
+    written to a compact binary snapshot, so a restart loads the snapshot and
+    replays only the journal tail.
+
+    Writers keep going while a snapshot is taken: each ledger (and the rule
+    list) is copied under its own lock together with the journal offset it
+    covers, and replay skips the records a ledger already contains.
+    """
+
+    def __init__(self, data_dir, sync_every=100, snapshot_every=100000):
+        self.data_dir = data_dir
+        self.journal_path = os.path.join(data_dir, "journal.txt")
+        self.snapshot_path = os.path.join(data_dir, "snapshot.bin")
+        self.sync_every = sync_every
+        self.snapshot_every = snapshot_every
+        self.unsynced = 0
+        self.since_snapshot = 0
+        self.lock = threading.Lock()  # guards the journal file and counters
+        self.checkpoint_lock = threading.Lock()  # one snapshot at a time
+        os.makedirs(data_dir, exist_ok=True)
+        truncate_torn_record(self.journal_path)
+        self.journal = open(self.journal_path, "ab")
+
+    def load(self, bank):
+        """Restore bank from the snapshot and the journal written after it.
+
+        Returns an IngestReport of the replay. A record the bank no longer
+        accepts (e.g. an amount format a later version rejects) is reported
+        with its byte offset in the journal instead of the line number.
+        """
+        report = IngestReport(self.journal_path)
+        rules_offset, account_offsets = 0, {}
+        if os.path.exists(self.snapshot_path) and snapshot_is_current(self.snapshot_path):
+            rules_offset, account_offsets = load_snapshot(self.snapshot_path, bank)
+        start = min([rules_offset, *account_offsets.values()])
+        bank.store = None  # replayed records are already in the journal
+        try:
+            for position, kind, parts in read_journal(self.journal_path, start):
+                self.since_snapshot += 1
+                if kind == "T":
+                    if position < account_offsets.get(parts[1], start):
+                        continue
+                    success, message = bank.add_transaction(*parts)
+                elif position >= rules_offset:
+                    success, message = bank.add_interest_rule(*parts)
+                else:
+                    continue
+                if success:
+                    report.accept()
+                else:
+                    report.reject(position, " ".join([kind, *parts]), message)
+        finally:
+            bank.store = self
+        return report.finish()
+
+    def record_transaction(self, date_str, account_id, type_str, amount_str):
+        # callers hold the account lock, so per-account order matches the ledger
+        self.append(f"T {date_str} {account_id} {type_str} {amount_str}\n")
+
+    def record_rule(self, date_str, ruleId, rate_str):
+        self.append(f"I {date_str} {ruleId} {rate_str}\n")
+
+    def append(self, record):
+        with self.lock:
+            self.journal.write(record.encode())
+            self.unsynced += 1
+            self.since_snapshot += 1
+            if self.unsynced >= self.sync_every:
+                self.sync()
+
+    def position(self):
+        with self.lock:
+            return self.journal.tell()
+
+    def sync(self):
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        self.unsynced = 0
+
+    def maybe_checkpoint(self, bank):
+        # called without any account lock held; skipped if one is running
+        if self.since_snapshot >= self.snapshot_every and self.checkpoint_lock.acquire(
+            blocking=False
+        ):
+            try:
+                self.write_checkpoint(bank)
+            finally:
+                self.checkpoint_lock.release()
+
+    def checkpoint(self, bank):
+        with self.checkpoint_lock:
+            self.write_checkpoint(bank)
+
+    def write_checkpoint(self, bank):
+        with self.lock:
+            self.since_snapshot = 0
+        write_snapshot(bank, self.snapshot_path, self)
+
+    def close(self):
+        with self.lock:
+            self.sync()
+            self.journal.close()
+
+
+def truncate_torn_record(path):
+    # drop a partially written last record so new records start on a fresh line
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as journal:
+        size = journal.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(end - 4096, 0)
+            journal.seek(start)
+            newline = journal.read(end - start).rfind(b"\n")
+            if newline != -1:
+                end = start + newline + 1
+                break
+            end = start
+        if end != size:
+            journal.truncate(end)
+
+
+def read_journal(path, offset=0):
+    # yield (position, kind, fields) records after offset, stopping at a torn last line
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as journal:
+        journal.seek(offset)
+        position = offset
+        for line in journal:
+            if not line.endswith(b"\n"):
+                break
+            kind, *parts = line.decode().split()
+            yield position, kind, parts
+            position += len(line)
+
+
+def write_snapshot(bank, path, store):
+    # ledger columns are written in native byte order, like array.tofile
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as out:
+        out.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, 0, 0, 0))
+        with bank.interest_rules.lock:
+            rules_offset = store.position()
+            rules = list(bank.interest_rules)
+        for rule in rules:
+            rule_id = rule.ruleId.encode()
+            out.write(RULE_HEADER.pack(int(rule.date), rule.rate, len(rule_id)))
+            out.write(rule_id)
+        account_count = 0
+        for account in bank.accounts.values():
+            with account.lock:
+                journal_offset = store.position()
+                account_id, dates, amounts, sequences = account.snapshot()
+            account_id = account_id.encode()
+            out.write(ACCOUNT_HEADER.pack(len(account_id), len(dates), journal_offset))
+            out.write(account_id)
+            dates.tofile(out)
+            amounts.tofile(out)
+            sequences.tofile(out)
+            account_count += 1
+        out.seek(0)
+        out.write(
+            SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, rules_offset, len(rules), account_count)
+        )
+        out.flush()
+        os.fsync(out.fileno())
+    # every offset recorded above must be durable before the snapshot is visible
+    with store.lock:
+        store.sync()
+    # readers only ever see a complete snapshot
+    os.replace(temp_path, path)
+
+
+def snapshot_is_current(path):
+    # older snapshot formats are skipped, the journal still holds every record
+    with open(path, "rb") as snapshot:
+        return snapshot.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+
+
+def load_snapshot(path, bank):
+    """Load a snapshot into bank, returning (rules journal offset,
+    {account_id: journal offset}) for the records it already contains."""
+    account_offsets = {}
+    with open(path, "rb") as snapshot, mmap.mmap(
+        snapshot.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped:
+        view = memoryview(mapped)
+        try:
+            magic, rules_offset, rule_count, account_count = (
+                SNAPSHOT_HEADER.unpack_from(view, 0)
+            )
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a bank snapshot")
+            position = SNAPSHOT_HEADER.size
+            for _ in range(rule_count):
+                date, rate, length = RULE_HEADER.unpack_from(view, position)
+                position += RULE_HEADER.size
+                rule_id = bytes(view[position : position + length]).decode()
+                position += length
+                bank.interest_rules.upsert(Interest(str(date), rule_id, rate))
+            for _ in range(account_count):
+                length, count, journal_offset = ACCOUNT_HEADER.unpack_from(
+                    view, position
+                )
+                position += ACCOUNT_HEADER.size
+                account_id = bytes(view[position : position + length]).decode()
+                position += length
+                columns = []
+                for typecode in ("i", "q", "I"):
+                    column = array(typecode)
+                    size = count * column.itemsize
+                    column.frombytes(view[position : position + size])
+                    position += size
+                    columns.append(column)
+                bank.accounts[account_id] = Account.from_snapshot(
+                    (account_id, *columns)
+                )
+                account_offsets[account_id] = journal_offset
+        finally:
+            view.release()
+    return rules_offset, account_offsets
@@ -0,0 +1,24 @@
+class RecomputeReport:
+    """What a retroactive interest rule changed in the stored month-end interest."""
+
+    def __init__(self, rule_date, window_end=None):
+        self.rule_date = rule_date
+        self.window_end = window_end  # date of the next rule, None if open ended
+        self.months = []  # [(year, month)] overlapping the rule's window
+        self.accounts_checked = 0
+        self.recomputed = 0
+        self.changes = []  # [(year, month, account_id, old interest, new interest)]
+
+    def format_changes(self):
+        return "".join(
+            f"{year}{month:02} {account_id}: {old:.2f} -> {new:.2f}\n"
+            for year, month, account_id, old, new in self.changes
+        )
+
+    def summary(self):
+        window = f"{self.rule_date}-{self.window_end or ''}"
+        return (
+            f"Rule window {window}: {len(self.months)} months, "
+            f"{self.recomputed} of {self.accounts_checked} account interests "
+            f"recomputed, {len(self.changes)} changed"
+        )
@@ -0,0 +1,50 @@
+class SegmentTree:
+    """Sparse range-add / range-min segment tree keyed by YYYYMMDD integers.
+
+    Adding an amount to every key from a date onward keeps each key's value
+    equal to the end of day balance on that date, so both the balance at a date
+    and the lowest balance over any date range are O(log n) queries. Nodes are
+    only stored once an update touches them; missing nodes are zero.
+    """
+
+    SIZE = 1 << 27  # larger than 99991231
+    LAST = SIZE - 1
+
+    def __init__(self):
+        self.pending = {}  # {node: amount added to the node's whole range}
+        self.low = {}  # {node: minimum over the node's range, incl. pending}
+
+    def add(self, lo, hi, value):
+        self._add(1, 0, self.LAST, lo, hi, value)
+
+    def min(self, lo, hi):
+        return self._min(1, 0, self.LAST, lo, hi)
+
+    def get(self, key):
+        return self._min(1, 0, self.LAST, key, key)
+
+    def _add(self, node, left, right, lo, hi, value):
+        if lo <= left and right <= hi:
+            self.pending[node] = self.pending.get(node, 0) + value
+            self.low[node] = self.low.get(node, 0) + value
+            return
+        mid = (left + right) // 2
+        if lo <= mid:
+            self._add(2 * node, left, mid, lo, hi, value)
+        if hi > mid:
+            self._add(2 * node + 1, mid + 1, right, lo, hi, value)
+        self.low[node] = min(
+            self.low.get(2 * node, 0), self.low.get(2 * node + 1, 0)
+        ) + self.pending.get(node, 0)
+
+    def _min(self, node, left, right, lo, hi):
+        if lo <= left and right <= hi:
+            return self.low.get(node, 0)
+        mid = (left + right) // 2
+        result = None
+        if lo <= mid:
+            result = self._min(2 * node, left, mid, lo, hi)
+        if hi > mid:
+            upper = self._min(2 * node + 1, mid + 1, right, lo, hi)
+            result = upper if result is None else min(result, upper)
+        return result + self.pending.get(node, 0)
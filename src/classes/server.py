@@ -0,0 +1,124 @@
+import asyncio
+from utils.parsing import parse_year_month
+
+
+class BankServer:
+    """Line protocol front-end serving many concurrent sessions from one Bank.
+
+    Requests are the menu commands with their input on the same line:
+
+        T <Date> <Account> <Type> <Amount>
+        I <Date> <RuleId> <Rate in %>
+        P <Account> <Year><Month>[-<Year><Month>]
+        Q
+
+    Each response is "OK <n>" followed by n lines of output, or "ERR <message>".
+    Clients may pipeline requests; a session answers them in order. Bank calls
+    run in worker threads so a journal fsync or snapshot never stalls the other
+    sessions; the account, rule and store locks keep concurrent writes
+    consistent. A session stops reading while its client is not draining
+    responses (backpressure through StreamWriter.drain).
+    """
+
+    def __init__(self, bank, high_water=64 * 1024):
+        self.bank = bank
+        self.high_water = high_water
+        self.sessions = 0
+        self.requests = 0
+
+    async def start(self, host="127.0.0.1", port=8888, unix_path=None):
+        if unix_path:
+            return await asyncio.start_unix_server(self.handle, path=unix_path)
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def handle(self, reader, writer):
+        self.sessions += 1
+        writer.transport.set_write_buffer_limits(high=self.high_water)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # over the stream limit, the rest of the line is unread
+                    writer.write(b"ERR Line too long.\n")
+                    break
+                if not line:
+                    break
+                try:
+                    command = line.decode().strip()
+                except UnicodeDecodeError:
+                    writer.write(b"ERR Invalid input. Must be UTF-8 text.\n")
+                    await writer.drain()
+                    continue
+                if command.upper() == "Q":
+                    writer.write(b"OK 0\n")
+                    break
+                self.requests += 1
+                response = await asyncio.to_thread(self.respond, command)
+                writer.write(response.encode())
+                # only waits when the client lets the buffer pass high_water
+                await writer.drain()
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    def respond(self, command):
+        choice, _, details = command.partition(" ")
+        parts = details.split()
+        choice = choice.upper()
+        if choice == "T":
+            if len(parts) != 4:
+                return "ERR Invalid input. Must be <Date> <Account> <Type> <Amount>.\n"
+            success, message = self.bank.add_transaction(*parts)
+            if not success:
+                return f"ERR {message.strip()}\n"
+            account = self.bank.accounts[parts[1]]
+            start = 0
+            if self.bank.echo_tail is not None:
+                start = max(len(account.transactions) - self.bank.echo_tail, 0)
+            return ok(account.iter_all_statements(start))
+        if choice == "I":
+            if len(parts) != 3:
+                return "ERR Invalid input. Must be <Date> <RuleId> <Rate in %>.\n"
+            success, message = self.bank.add_interest_rule(*parts)
+            if not success:
+                return f"ERR {message.strip()}\n"
+            lines = ["| Date     | RuleId | Rate (%) |\n"]
+            lines.extend(f"{rule}\n" for rule in self.bank.interest_rules)
+            return ok(lines)
+        if choice == "P":
+            if len(parts) != 2:
+                return "ERR Invalid input. Must be <Account> <Year><Month>.\n"
+            account_id, year_month_str = parts
+            start_str, _, end_str = year_month_str.partition("-")
+            start = parse_year_month(start_str)
+            end = parse_year_month(end_str) if end_str else start
+            if start is None or end is None:
+                return "ERR Invalid date format. Must be YYYYMM or YYYYMM-YYYYMM\n"
+            if end < start:
+                return "ERR Invalid range. End month must not be before start month\n"
+            if account_id not in self.bank.accounts:
+                return f"ERR Account {account_id} not found\n"
+            if end_str:
+                statement = self.bank.accounts[account_id].generate_range_statement(
+                    *start, *end, self.bank.interest_rules
+                )
+                return ok(statement.splitlines(keepends=True))
+            statement, _ = self.bank.statement_cache.get(
+                self.bank.accounts[account_id], *start, self.bank.interest_rules
+            )
+            return ok(statement.splitlines(keepends=True))
+        return "ERR Invalid choice. Must be T, I, P or Q.\n"
+
+
+def ok(lines):
+    lines = list(lines)
+    return f"OK {len(lines)}\n" + "".join(lines)
+
+
+async def serve(bank, host="127.0.0.1", port=8888, unix_path=None):
+    server = await BankServer(bank).start(host, port, unix_path)
+    async with server:
+        await server.serve_forever()
@@ -0,0 +1,42 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from classes.account import Account
+from classes.interest import Interest, InterestRuleTimeline
+
+
+def write_statements(bank, year, month, out_dir, workers=None, chunk_size=1000):
+    """Write the month's statement of every account in bank to out_dir.
+
+    Accounts are split into chunks of chunk_size; each chunk is shipped to a
+    worker process as ledger snapshots plus the interest rules and written to
+    its own file. Returns the paths written, in account order.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rules = [(rule.date, rule.ruleId, rule.rate) for rule in bank.interest_rules]
+    account_ids = list(bank.accounts)
+    jobs = []
+    for chunk, start in enumerate(range(0, len(account_ids), chunk_size)):
+        path = os.path.join(out_dir, f"statements_{year}{month:02}_{chunk:04d}.txt")
+        snapshots = [
+            bank.accounts[account_id].snapshot()
+            for account_id in account_ids[start : start + chunk_size]
+        ]
+        jobs.append((path, year, month, rules, snapshots))
+    if workers == 1 or len(jobs) <= 1:
+        return [write_statement_chunk(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(write_statement_chunk, jobs))
+
+
+def write_statement_chunk(job):
+    # runs in a worker process, so it only receives plain data
+    path, year, month, rules, snapshots = job
+    interest_rules = InterestRuleTimeline()
+    for date_str, rule_id, rate in rules:
+        interest_rules.upsert(Interest(date_str, rule_id, rate))
+    with open(path, "w") as out:
+        for snapshot in snapshots:
+            account = Account.from_snapshot(snapshot)
+            out.write(account.generate_monthly_statement(year, month, interest_rules))
+            out.write("\n")
+    return path
@@ -0,0 +1,89 @@
+import threading
+import weakref
+from collections import OrderedDict
+from utils.instrumentation import timed
+
+
+class StatementCache:
+    """Bounded LRU of monthly statements keyed by (account, year, month).
+
+    Each entry remembers the account and rule versions it was built from. A
+    newer version only invalidates the entry when one of the changes since then
+    is dated on or before the end of the cached month.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()  # {(account_id, year, month): CachedStatement}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()  # guards entries and counters
+
+    @timed("statement_cache.get")
+    def get(self, account, year, month, interest_rules):
+        """Return (statement, interest), building and caching it on a miss."""
+        key = (account.account, year, month)
+        month_end = year * 10000 + month * 100 + 99
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry.is_fresh(account, interest_rules, month_end):
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.statement, entry.interest
+                del self.entries[key]
+                self.invalidations += 1
+            self.misses += 1
+        # build outside the cache lock, the account lock keeps it consistent
+        entry = CachedStatement(account, interest_rules, year, month)
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return entry.statement, entry.interest
+
+    def stats(self):
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class CachedStatement:
+    def __init__(self, account, interest_rules, year, month):
+        # a weak reference, so the cache never keeps an evicted or replaced
+        # account's ledger alive; a dead or different account is a miss
+        self.account_ref = weakref.ref(account)
+        self.interest_rules = interest_rules
+        # a rule upserted while building only makes the entry look older than
+        # it is, so reading the rule version first is safe
+        self.rules_version = interest_rules.version
+        with account.lock:
+            self.account_version = account.version
+            self.statement, self.interest = account.build_monthly_statement(
+                year, month, interest_rules
+            )
+
+    def is_fresh(self, account, interest_rules, month_end):
+        if self.account_ref() is not account:
+            return False
+        if interest_rules is not self.interest_rules:
+            return False
+        # changes dated after the month cannot affect it
+        for day in account.change_dates[self.account_version :]:
+            if day <= month_end:
+                return False
+        for day in interest_rules.change_dates[self.rules_version :]:
+            if day <= month_end:
+                return False
+        self.account_version = account.version
+        self.rules_version = interest_rules.version
+        return True
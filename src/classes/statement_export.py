@@ -0,0 +1,139 @@
+"""Month-end statement rows as data: CSV and fixed-width binary records.
+
+Every account contributes its transactions of the month followed by one
+interest row (type "I", sequence 0), with the running balance after each row,
+as in generate_monthly_statement. Amounts are unsigned (the type carries the
+sign); the binary format keeps them in integer cents.
+
+A binary record is RECORD (44 bytes, little endian, no file header):
+
+    account   16s  account id, NUL padded
+    date      i    YYYYMMDD
+    sequence  I    txn id is f"{date}-{sequence:02d}", 0 for interest
+    type      c    b"D", b"W" or b"I"
+    (pad)     3x
+    amount    q    cents
+    balance   q    cents, after this row
+
+so numpy.frombuffer(data, dtype=RECORD_DTYPE) reads a whole file at once.
+"""
+
+import calendar
+import csv
+import struct
+from utils.instrumentation import timed
+
+try:
+    import numpy
+except ImportError:  # numpy is optional, read_records falls back to struct
+    numpy = None
+
+ACCOUNT_ID_BYTES = 16
+RECORD = struct.Struct("<16siIc3xqq")
+RECORD_FIELDS = [
+    ("account", "S16"),
+    ("date", "<i4"),
+    ("sequence", "<u4"),
+    ("type", "S1"),
+    ("pad", "V3"),
+    ("amount", "<i8"),
+    ("balance", "<i8"),
+]
+RECORD_DTYPE = numpy.dtype(RECORD_FIELDS) if numpy is not None else None
+CSV_HEADER = ("account", "date", "txn_id", "type", "amount", "balance")
+BUFFER_SIZE = 1 << 20
+
+
+@timed("export.month")
+def export_month(bank, year, month, csv_path=None, binary_path=None):
+    """Write every account's statement rows for the month to csv_path and/or
+    binary_path. Returns the number of rows written to each."""
+    if binary_path:
+        # refuse up front rather than leave half-written files behind
+        for account_id in bank.accounts:
+            if len(account_id.encode()) > ACCOUNT_ID_BYTES:
+                raise ValueError(
+                    f"Account id {account_id} is longer than {ACCOUNT_ID_BYTES} "
+                    "bytes and does not fit a binary record"
+                )
+    csv_out = binary_out = None
+    if csv_path:
+        csv_out = open(csv_path, "w", newline="", buffering=BUFFER_SIZE)
+    if binary_path:
+        binary_out = open(binary_path, "wb", buffering=BUFFER_SIZE)
+    rows = 0
+    try:
+        if csv_out:
+            writer = csv.writer(csv_out, lineterminator="\n")
+            writer.writerow(CSV_HEADER)
+        for account in bank.accounts.values():
+            records = month_records(account, year, month, bank.interest_rules)
+            if csv_out:
+                writer.writerows(map(csv_row, records))
+            if binary_out:
+                binary_out.write(b"".join(map(binary_record, records)))
+            rows += len(records)
+    finally:
+        if csv_out:
+            csv_out.close()
+        if binary_out:
+            binary_out.close()
+    return rows
+
+
+def month_records(account, year, month, interest_rules):
+    # [(account, date, sequence, type, amount cents, balance cents)] of the month
+    last_day = calendar.monthrange(year, month)[1]
+    with account.lock:
+        interest = account.calculate_interest(year, month, interest_rules)
+        start, end = account.month_range(year, month)
+        ledger = account.transactions
+        dates = ledger.dates[start:end]
+        amounts = ledger.amounts[start:end]
+        sequences = ledger.sequences[start:end]
+        balance = account.opening_balance(year, month)
+    account_id = account.account
+    records = []
+    for date, sequence, cents in zip(dates, sequences, amounts):
+        balance += cents
+        if cents > 0:
+            records.append((account_id, date, sequence, "D", cents, balance))
+        else:
+            records.append((account_id, date, sequence, "W", -cents, balance))
+    date = year * 10000 + month * 100 + last_day
+    records.append((account_id, date, 0, "I", interest, balance + interest))
+    return records
+
+
+def csv_row(record):
+    account_id, date, sequence, type_str, amount, balance = record
+    txn_id = f"{date}-{sequence:02d}" if sequence else ""
+    return (
+        account_id,
+        date,
+        txn_id,
+        type_str,
+        format_cents(amount),
+        format_cents(balance),
+    )
+
+
+def binary_record(record):
+    account_id, date, sequence, type_str, amount, balance = record
+    return RECORD.pack(
+        account_id.encode(), date, sequence, type_str.encode(), amount, balance
+    )
+
+
+def format_cents(cents):
+    sign = "-" if cents < 0 else ""
+    cents = abs(cents)
+    return f"{sign}{cents // 100}.{cents % 100:02d}"
+
+
+def read_records(data):
+    """Binary records in data (bytes or memoryview) as a numpy structured
+    array, or as a list of RECORD tuples without numpy."""
+    if numpy is not None:
+        return numpy.frombuffer(data, dtype=RECORD_DTYPE)
+    return list(RECORD.iter_unpack(data))
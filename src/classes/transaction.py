@@ -1,11 +1,34 @@
 class Transaction:
+    """Read-only view of one ledger row.
 
-    def __init__(self, account, date, txn_id, type, amount):
+    Rows live in the account's Ledger arrays; a Transaction is only built when
+    a caller asks for one. The amount is kept as signed integer cents, deposits
+    positive and withdrawals negative.
+    """
+
+    __slots__ = ("account", "day", "sequence", "cents")
+
+    def __init__(self, account, day, sequence, cents):
         self.account = account
-        self.date = date
-        self.txn_id = txn_id
-        self.type = type
-        self.amount = amount
+        self.day = day  # YYYYMMDD int
+        self.sequence = sequence  # running number within the day
+        self.cents = cents
+
+    @property
+    def date(self):
+        return str(self.day)
+
+    @property
+    def txn_id(self):
+        return f"{self.day}-{self.sequence:02d}"
+
+    @property
+    def type(self):
+        return "D" if self.cents > 0 else "W"
+
+    @property
+    def amount(self):
+        return abs(self.cents) / 100
 
     def __str__(self):
         return f"| {self.date} | {self.account} | {self.type} | {self.amount} |"
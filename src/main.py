@@ -1,4 +1,227 @@
+import argparse
+import asyncio
+import cProfile
+import json
+import os
+import sys
 from classes.bank import Bank
+from classes.parallel_ingest import ingest_parallel
+from classes.persistence import BankStore
+from classes.server import serve
+from classes.statement_batch import write_statements
+from classes.statement_export import export_month
+from utils import instrumentation
+from utils.parsing import parse_year_month
 
-bank = Bank()
-bank.run()
\ No newline at end of file
+
+def open_input(path):
+    # "-" reads from stdin so feeds can be piped straight in
+    if path == "-":
+        return sys.stdin
+    return open(path, "r")
+
+
+def ingest(bank, args):
+    load(bank, args.transactions, args.rules, args.workers)
+
+
+def load(bank, transactions, rules, workers=1):
+    sources = []
+    if rules:
+        sources.append((rules, "I"))
+    if transactions:
+        sources.append((transactions, "T"))
+    for path, kind in sources:
+        stream = open_input(path)
+        try:
+            if kind == "T" and workers != 1:
+                report = ingest_parallel(bank, stream, workers, source=path)
+            else:
+                report = bank.ingest_stream(stream, kind, source=path)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        sys.stdout.write(report.format_rejects())
+        print(report.summary())
+
+
+def statements(bank, args):
+    year, month = args.month
+    load(bank, args.transactions, args.rules)
+    paths = write_statements(bank, year, month, args.out, args.workers, args.chunk_size)
+    print(f"Wrote {len(bank.accounts)} statements to {len(paths)} files in {args.out}")
+
+
+def export(bank, args):
+    year, month = args.month
+    load(bank, args.transactions, args.rules)
+    try:
+        rows = export_month(bank, year, month, args.csv, args.binary)
+    except ValueError as error:
+        sys.exit(f"export: {error}")
+    print(f"Exported {rows} rows for {len(bank.accounts)} accounts")
+
+
+def year_month(text):
+    # argparse type for <Year><Month>, validated like the prompts
+    parsed = parse_year_month(text)
+    if parsed is None:
+        raise argparse.ArgumentTypeError(f"invalid month {text!r}, must be YYYYMM")
+    return parsed
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="AwesomeGIC Bank")
+    parser.add_argument(
+        "--tail",
+        type=int,
+        default=None,
+        help="only echo the last N rows of an account after each transaction",
+    )
+    parser.add_argument(
+        "--instrument",
+        action="store_true",
+        help="time the hot paths, see the [S] Stats menu",
+    )
+    parser.add_argument(
+        "--profile-out",
+        default=None,
+        help="on exit write timers to this .json file, or a cProfile dump for any other name",
+    )
+    parser.add_argument(
+        "--data-dir",
+        default=None,
+        help="keep a journal and snapshots here and restore from them on start",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=float,
+        default=None,
+        help="MB of accounts to keep in memory, colder accounts are moved to disk",
+    )
+    commands = parser.add_subparsers(dest="command")
+
+    ingest_parser = commands.add_parser(
+        "ingest", help="bulk-load transaction and interest rule files"
+    )
+    ingest_parser.add_argument(
+        "transactions", help="<Date> <Account> <Type> <Amount> lines, - for stdin"
+    )
+    ingest_parser.add_argument(
+        "rules", nargs="?", help="<Date> <RuleId> <Rate in %%> lines, - for stdin"
+    )
+    ingest_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="split transactions by account across N processes (0: one per CPU)",
+    )
+
+    statements_parser = commands.add_parser(
+        "statements", help="write every account's statement for a month"
+    )
+    statements_parser.add_argument(
+        "month", type=year_month, help="<Year><Month>, e.g. 202306"
+    )
+    statements_parser.add_argument("--transactions", help="transaction file to load")
+    statements_parser.add_argument("--rules", help="interest rule file to load")
+    statements_parser.add_argument(
+        "--workers", type=int, default=None, help="worker processes (default: CPUs)"
+    )
+    statements_parser.add_argument(
+        "--chunk-size", type=int, default=1000, help="accounts per output file"
+    )
+    statements_parser.add_argument("--out", default="statements", help="output directory")
+
+    export_parser = commands.add_parser(
+        "export", help="write every account's statement rows for a month as CSV/binary"
+    )
+    export_parser.add_argument(
+        "month", type=year_month, help="<Year><Month>, e.g. 202306"
+    )
+    export_parser.add_argument("--transactions", help="transaction file to load")
+    export_parser.add_argument("--rules", help="interest rule file to load")
+    export_parser.add_argument("--csv", default=None, help="CSV output path")
+    export_parser.add_argument(
+        "--binary", default=None, help="fixed-width binary output path"
+    )
+
+    serve_parser = commands.add_parser(
+        "serve", help="serve the T/I/P commands as a line protocol over TCP"
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8888)
+    serve_parser.add_argument("--unix", default=None, help="listen on a Unix socket instead")
+
+    commands.add_parser(
+        "snapshot", help="write a snapshot of --data-dir so restarts skip the journal"
+    )
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "snapshot" and not args.data_dir:
+        parser.error("snapshot needs --data-dir")
+    if args.command == "export" and not (args.csv or args.binary):
+        parser.error("export needs --csv and/or --binary")
+    profiler = None
+    if args.instrument or args.profile_out:
+        instrumentation.enable()
+    if args.profile_out and not args.profile_out.endswith(".json"):
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        run(args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile_out)
+        elif args.profile_out:
+            with open(args.profile_out, "w") as out:
+                json.dump(instrumentation.stats(), out, indent=2)
+
+
+def run(args):
+    memory_budget = cold_path = None
+    if args.memory_budget is not None:
+        memory_budget = int(args.memory_budget * 1024 * 1024)
+        if args.data_dir:
+            cold_path = os.path.join(args.data_dir, "cold", "accounts.seg")
+    bank = Bank(echo_tail=args.tail, memory_budget=memory_budget, cold_path=cold_path)
+    store = None
+    if args.data_dir:
+        store = BankStore(args.data_dir)
+        replay = store.load(bank)
+        if replay.rejects:
+            # the bank now differs from what was journaled, say so before going on
+            sys.stderr.write(replay.format_rejects())
+            print(
+                f"warning: {len(replay.rejects)} journal records could not be replayed",
+                file=sys.stderr,
+            )
+    try:
+        if args.command == "ingest":
+            ingest(bank, args)
+        elif args.command == "statements":
+            statements(bank, args)
+        elif args.command == "export":
+            export(bank, args)
+        elif args.command == "snapshot":
+            store.checkpoint(bank)
+        elif args.command == "serve":
+            try:
+                asyncio.run(serve(bank, args.host, args.port, args.unix))
+            except KeyboardInterrupt:
+                pass
+        else:
+            bank.run()
+    finally:
+        if store is not None:
+            store.close()
+        bank.close()
+
+
+if __name__ == "__main__":
+    main()
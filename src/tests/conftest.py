@@ -0,0 +1,20 @@
+import random
+
+
+def add_random_transactions(bank, count, accounts, months, seed):
+    """Add count seeded random deposits and withdrawals (some rejected) over
+    accounts AC001..AC<accounts>, dated in the given months of 2023."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        date_str = f"2023{rng.choice(months):02}{rng.randint(1, 28):02}"
+        amount_str = f"{rng.randint(1, 100000) / 100:.2f}"
+        bank.add_transaction(date_str, f"AC{rng.randint(1, accounts):03}", rng.choice("DDW"), amount_str)
+
+
+def statements(bank, year=2023, month=6):
+    """Every account's full history and monthly statement, by account id."""
+    return {
+        account_id: account.generate_all_statements()
+        + account.generate_monthly_statement(year, month, bank.interest_rules)
+        for account_id, account in sorted(bank.accounts.items())
+    }
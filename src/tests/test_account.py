@@ -1,5 +1,10 @@
+import pickle
+import random
 import pytest
 from classes.account import Account
+from classes.interest import Interest, InterestRuleTimeline
+from classes.ledger import MAX_SEQUENCE
+from tests.reference_account import ReferenceAccount
 
 
 class MockInterestRule:
@@ -38,6 +43,42 @@ def test_add_transaction_value_error(account):
     assert message == "Invalid amount. Must be a number. \n"
 
 
+def test_add_transaction_more_than_two_decimals(account):
+    success, message = account.add_transaction("20230101", "AC001", "D", "100.005")
+    assert success == False
+    assert message == "Invalid amount. At most 2 decimal places are allowed. \n"
+
+
+def test_add_transaction_amount_too_large(account):
+    success, message = account.add_transaction("20230101", "AC001", "D", "999999999999999999999")
+    assert success == False
+    assert message == "Amount is too large. \n"
+    assert len(account.transactions) == 0
+    assert account.generate_all_statements().count("\n") == 2
+
+
+def test_add_transaction_sequence_numbers_past_65535(account):
+    account.add_transaction("20230101", "AC001", "D", "1")
+    account.dates_counter[20230101] = 65535
+    assert account.add_transaction("20230101", "AC001", "D", "1")[0] == True
+    assert account.transactions[-1].txn_id == "20230101-65536"
+    account.dates_counter[20230101] = MAX_SEQUENCE
+    success, message = account.add_transaction("20230101", "AC001", "D", "1")
+    assert (success, message) == (False, "Too many transactions on this date. \n")
+    assert account.dates_counter[20230101] == MAX_SEQUENCE
+    assert len(account.generate_all_statements().splitlines()) == 4
+
+
+def test_ledger_insert_is_all_or_nothing(account):
+    account.add_transaction("20230101", "AC001", "D", "1")
+    ledger = account.transactions
+    with pytest.raises(OverflowError):
+        ledger.insert(20230102, 1, 1 << 63)
+    with pytest.raises(OverflowError):
+        ledger.insert(20230102, MAX_SEQUENCE + 1, 100)
+    assert len(ledger.dates) == len(ledger.amounts) == len(ledger.sequences) == 1
+
+
 def test_add_transaction_zero_amount(account):
     # Adding a transaction with an amount of zero.
     success, message = account.add_transaction("20250101", "AC001", "D", "0")
@@ -134,3 +175,203 @@ def test_add_transaction_generate_all_statements(account):
     statement = account.generate_all_statements()
     assert "| 20250101     | 20250101-01      | D    | 100.00  | 100.00 |" in statement
     assert "| 20250102     | 20250102-01      | W    | 50.00  | 50.00 |" in statement
+
+
+# -------------------------
+# Tests for balance_as_of
+# -------------------------
+def test_balance_as_of_backdated_inserts_keep_date_order(account):
+    # Out of order inserts end up sorted by date, same-day entries keep their order.
+    account.add_transaction("20250110", "AC001", "D", "100")
+    account.add_transaction("20250105", "AC001", "D", "50")
+    account.add_transaction("20250110", "AC001", "W", "30")
+    account.add_transaction("20250101", "AC001", "D", "10")
+    assert [txn.txn_id for txn in account.transactions] == [
+        "20250101-01",
+        "20250105-01",
+        "20250110-01",
+        "20250110-02",
+    ]
+    assert account.balance_as_of("20241231") == 0
+    assert account.balance_as_of("20250101") == 10
+    assert account.balance_as_of("20250109") == 60
+    assert account.balance_as_of("20250110") == 130
+    assert account.balance_as_of("20991231") == 130
+
+
+def test_get_transactions_in_month(account):
+    account.add_transaction("20250201", "AC001", "D", "100")
+    account.add_transaction("20250131", "AC001", "D", "100")
+    account.add_transaction("20250228", "AC001", "D", "100")
+    account.add_transaction("20250301", "AC001", "D", "100")
+    dates = [txn.date for txn in account.get_transactions_in_month(2025, 2)]
+    assert dates == ["20250201", "20250228"]
+
+
+def test_add_transaction_backdated_withdrawal_cannot_overdraw_later_dates(account):
+    # A backdated withdrawal must not push any later end of day balance below zero.
+    account.add_transaction("20250101", "AC001", "D", "100")
+    account.add_transaction("20250110", "AC001", "W", "80")
+    success, message = account.add_transaction("20250105", "AC001", "W", "50")
+    assert success == False
+    assert message == "Insufficient funds. \n"
+    success, _ = account.add_transaction("20250105", "AC001", "W", "20")
+    assert success == True
+    assert account.balance_as_of("20250105") == 80
+    assert account.min_balance_from("20250101") == 0
+
+
+# -------------------------
+# Tests for the interest engine
+# -------------------------
+def test_generate_monthly_statement_matches_reference():
+    # Golden test: random histories must produce the same statements as the original code.
+    # Events on the last day of the month are left out, the original code applied the
+    # previous day's balance and rate to a last day that differs from the day before.
+    rng = random.Random(2025)
+    for _ in range(50):
+        account, reference = Account("AC001"), ReferenceAccount("AC001")
+        for _ in range(rng.randint(1, 40)):
+            date_str = f"2024{rng.randint(1, 4):02}{rng.randint(1, 27):02}"
+            type_str = rng.choice("DDW")
+            amount_str = f"{rng.randint(1, 50000) / 100:.2f}"
+            if account.add_transaction(date_str, "AC001", type_str, amount_str)[0]:
+                reference.add_transaction(date_str, "AC001", type_str, amount_str)
+        rules = sorted(
+            {
+                f"2024{rng.randint(1, 4):02}{rng.randint(1, 27):02}": rng.randint(1, 500) / 100
+                for _ in range(rng.randint(0, 6))
+            }.items()
+        )
+        rules = [MockInterestRule(date, rate) for date, rate in rules]
+        assert account.generate_all_statements() == reference.generate_all_statements()
+        for month in range(1, 6):
+            assert account.generate_monthly_statement(
+                2024, month, rules
+            ) == reference.generate_monthly_statement(2024, month, rules)
+
+
+def test_accrued_interest_matches_sweep_with_backdated_inserts_and_rule_changes():
+    # The incremental accrual must agree with a full sweep after every insert,
+    # including backdated ones and retroactive rule changes.
+    rng = random.Random(16)
+    account, timeline = Account("AC001"), InterestRuleTimeline()
+    timeline.upsert(Interest("20240101", "R0", 2.0))
+    for step in range(300):
+        date_str = f"2024{rng.randint(1, 3):02}{rng.randint(1, 31 if step % 2 else 28):02}"
+        if rng.random() < 0.05:
+            timeline.upsert(Interest(date_str[:6] + "15", f"R{step}", rng.randint(1, 500) / 100))
+        else:
+            account.add_transaction(date_str, "AC001", rng.choice("DDW"), f"{rng.randint(1, 50000) / 100:.2f}")
+        for month in range(1, 4):
+            assert account.calculate_interest(2024, month, timeline) == account.calculate_interest(
+                2024, month, list(timeline)
+            )
+    assert set(account.accruals) == {202401, 202402, 202403}
+
+
+def test_generate_range_statement_single_month_matches_monthly(account):
+    account.add_transaction("20230505", "AC001", "D", "100")
+    account.add_transaction("20230601", "AC001", "D", "150")
+    account.add_transaction("20230626", "AC001", "W", "20")
+    account.add_transaction("20230626", "AC001", "W", "100")
+    rules = [MockInterestRule("20230101", 1.95), MockInterestRule("20230520", 1.90), MockInterestRule("20230615", 2.20)]
+    assert account.generate_range_statement(2023, 6, 2023, 6, rules) == account.generate_monthly_statement(2023, 6, rules)
+
+
+def test_generate_range_statement_carries_interest_forward(account):
+    account.add_transaction("20221215", "AC001", "D", "36500")
+    account.add_transaction("20230210", "AC001", "W", "100")
+    rules = [MockInterestRule("20230101", 1.0)]
+    lines = account.generate_range_statement(2022, 12, 2023, 2, rules).splitlines()
+    assert lines[2:] == [
+        "| 20221215     | 20221215-01      | D    | 36500.00  | 36500.00 | ",
+        "| 20221231     |                  | I    | 0.00  | 36500.00 | ",
+        # 31 days at 1% on 36500.00
+        "| 20230131     |                  | I    | 31.00  | 36531.00 | ",
+        "| 20230210     | 20230210-01      | W    | 100.00  | 36431.00 | ",
+        # January's interest earns interest in February
+        "| 20230228     |                  | I    | 27.97  | 36458.97 | ",
+    ]
+
+
+def test_generate_monthly_statement_transaction_on_last_day(account):
+    # The balance after a withdrawal on the last day earns interest for that day.
+    account.add_transaction("20250101", "AC001", "D", "36500")
+    account.add_transaction("20250131", "AC001", "W", "36400")
+    statement = account.generate_monthly_statement(2025, 1, [MockInterestRule("20250101", 1.0)])
+    assert "| 20250131     |                  | I    | 30.00  | 130.00 |" in statement
+
+
+def test_month_checkpoints_follow_backdated_inserts():
+    # Checkpoints must match the balance tree and a binary search of the ledger.
+    rng = random.Random(24)
+    account = Account("AC001")
+    for _ in range(400):
+        date_str = f"{rng.choice((2023, 2024))}{rng.randint(1, 12):02}{rng.randint(1, 28):02}"
+        account.add_transaction(date_str, "AC001", rng.choice("DDW"), f"{rng.randint(1, 50000) / 100:.2f}")
+    for year in (2022, 2023, 2024, 2025):
+        for month in range(1, 13):
+            first_day = year * 10000 + month * 100
+            assert account.opening_balance(year, month) == account.balances.get(first_day)
+            start, end = account.transactions.range(first_day + 1, first_day + 99)
+            assert [txn.txn_id for txn in account.get_transactions_in_month(year, month)] == [
+                txn.txn_id for txn in account.transactions[start:end]
+            ]
+    assert list(account.month_keys) == sorted(account.months)
+    restored = Account.from_snapshot(account.snapshot())
+    assert restored.months == account.months
+    assert restored.month_keys == account.month_keys
+
+
+def test_snapshot_round_trip(account):
+    account.add_transaction("20250110", "AC001", "D", "100")
+    account.add_transaction("20250105", "AC001", "D", "50.25")
+    account.add_transaction("20250110", "AC001", "W", "30")
+    restored = Account.from_snapshot(account.snapshot())
+    assert restored.generate_all_statements() == account.generate_all_statements()
+    assert restored.balance_as_of("20250109") == 50.25
+    # transaction ids keep running from the restored ledger
+    restored.add_transaction("20250110", "AC001", "D", "1")
+    assert restored.transactions[-1].txn_id == "20250110-03"
+
+
+def test_pickle_round_trip(account):
+    account.add_transaction("20250110", "AC001", "D", "100")
+    account.add_transaction("20250110", "AC001", "W", "30")
+    restored = pickle.loads(pickle.dumps(account))
+    assert restored.generate_all_statements() == account.generate_all_statements()
+    assert restored.lock is not account.lock
+    restored.add_transaction("20250110", "AC001", "D", "1")
+    assert restored.transactions[-1].txn_id == "20250110-03"
+    assert len(account.transactions) == 2
+
+
+def test_add_transaction_balance_is_exact_in_cents(account):
+    # 0.7 + 0.1 is 0.7999999999999999 in floating point, in cents it is exactly 80.
+    account.add_transaction("20250101", "AC001", "D", "0.7")
+    account.add_transaction("20250101", "AC001", "D", "0.1")
+    success, _ = account.add_transaction("20250102", "AC001", "W", "0.8")
+    assert success == True
+    assert account.balance_as_of("20250102") == 0
+    txn = account.transactions[-1]
+    assert (txn.date, txn.txn_id, txn.type, txn.amount, txn.cents) == (
+        "20250102",
+        "20250102-01",
+        "W",
+        0.8,
+        -80,
+    )
+
+
+def test_iter_all_statements_pages(account):
+    # Any page of rows matches the same rows of the full statement, balances included.
+    for day in ("05", "03", "05", "01", "05", "09"):
+        account.add_transaction(f"202501{day}", "AC001", "D", day)
+    account.add_transaction("20250105", "AC001", "W", "7")
+    lines = list(account.iter_all_statements())
+    assert "".join(lines) == account.generate_all_statements()
+    for start in range(len(account.transactions) + 1):
+        for stop in range(start, len(account.transactions) + 1):
+            assert list(account.iter_all_statements(start, stop)) == lines[:2] + lines[2 + start : 2 + stop]
+    assert list(account.iter_all_statements(-2)) == lines[:2] + lines[-2:]
@@ -0,0 +1,84 @@
+import threading
+from classes.account import Account
+from classes.account_map import AccountMap
+from classes.bank import Bank
+
+
+def test_account_map_behaves_like_a_dict():
+    accounts = AccountMap(shards=4)
+    for index in range(20):
+        accounts[f"AC{index:03}"] = Account(f"AC{index:03}")
+    assert len(accounts) == 20
+    assert "AC007" in accounts
+    assert accounts["AC007"].account == "AC007"
+    assert accounts.get("AC999") is None
+    assert sorted(accounts) == [f"AC{index:03}" for index in range(20)]
+    assert {account_id for account_id, _ in accounts.items()} == set(accounts.keys())
+    first = accounts["AC001"]
+    assert accounts.setdefault("AC001", Account("AC001")) is first
+    del accounts["AC001"]
+    assert "AC001" not in accounts
+
+
+def test_concurrent_ingest():
+    # Threads feeding their own accounts plus one shared account lose nothing.
+    bank = Bank()
+    threads = 8
+    per_thread = 300
+
+    def feed(index):
+        for day in range(1, per_thread + 1):
+            date_str = f"2023{(day - 1) // 28 + 1:02}{(day - 1) % 28 + 1:02}"
+            bank.add_transaction(date_str, f"AC{index:03}", "D", "1.00")
+            bank.add_transaction(date_str, "SHARED", "D", "0.01")
+
+    workers = [threading.Thread(target=feed, args=(index,)) for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert len(bank.accounts) == threads + 1
+    shared = bank.accounts["SHARED"]
+    assert len(shared.transactions) == threads * per_thread
+    assert shared.balance_as_of("20991231") == threads * per_thread / 100
+    # every txn id on a day is unique and the running numbers have no gaps
+    ids = [txn.txn_id for txn in shared.transactions]
+    assert len(set(ids)) == len(ids)
+    assert shared.transactions[threads - 1].txn_id == f"20230101-{threads:02d}"
+    for index in range(threads):
+        assert len(bank.accounts[f"AC{index:03}"].transactions) == per_thread
+
+
+def test_rule_changes_race_transactions_on_stored_interest():
+    # Recomputing stored interest while transactions drop entries raises nothing.
+    bank = Bank()
+    bank.add_interest_rule("20230101", "RULE00", "1")
+    for index in range(200):
+        bank.add_transaction("20230101", f"AC{index:03}", "D", "1000")
+    for month in range(1, 13):
+        bank.compute_month_interest(2023, month)
+    errors = []
+
+    def add_rules():
+        try:
+            for day in range(1, 29):
+                bank.add_interest_rule(f"202302{day:02}", "RULE01", f"{day % 9 + 1}")
+        except Exception as error:
+            errors.append(error)
+
+    def add_transactions():
+        try:
+            for index in range(200):
+                bank.add_transaction("20230315", f"AC{index:03}", "D", "1")
+        except Exception as error:
+            errors.append(error)
+
+    workers = [threading.Thread(target=add_rules), threading.Thread(target=add_transactions)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert errors == []
+    # every account had a transaction in March, so no later month keeps a result
+    for month in range(3, 13):
+        assert bank.interest_results[(2023, month)] == {}
@@ -4,6 +4,7 @@ import sys
 from unittest.mock import patch
 from classes.bank import Bank
 from classes.account import Account
+from tests.conftest import add_random_transactions
 
 
 class TestBank(unittest.TestCase):
@@ -102,6 +103,19 @@ class TestBank(unittest.TestCase):
             self.assertIn("20230301-01", output)
             self.assertIn("20230301-02", output)
 
+    def test_input_transactions_echo_tail(self):
+        # With echo_tail only the last rows of the history are printed after an insert.
+        self.bank.echo_tail = 1
+        inputs = ["20230301 ACC001 D 1000", "20230302 ACC001 D 500", ""]
+        with patch("builtins.input", side_effect=inputs):
+            captured_output = StringIO()
+            sys.stdout = captured_output
+            self.bank.input_transactions()
+            sys.stdout = sys.__stdout__
+            output = captured_output.getvalue()
+            self.assertEqual(output.count("| 20230301     | 20230301-01"), 1)
+            self.assertIn("| 20230302     | 20230302-01      | D    | 500.00  | 1500.00 |", output)
+
     # ----------------------------
     # Tests for print_monthly_statement
     # ----------------------------
@@ -122,6 +136,35 @@ class TestBank(unittest.TestCase):
             # Check that the interest calculation row is present (row starts with date and "I" type)
             self.assertIn(" I    ", output)
 
+    def test_print_monthly_statement_range(self):
+        self.bank.add_transaction("20230301", "ACC001", "D", "1000")
+        self.bank.add_transaction("20230415", "ACC001", "W", "200")
+        self.bank.add_interest_rule("20230101", "RULE01", "2")
+        inputs = ["ACC001 202303-202304", "ACC001 202304-202303", ""]
+        with patch("builtins.input", side_effect=inputs):
+            captured_output = StringIO()
+            sys.stdout = captured_output
+            self.bank.print_monthly_statement()
+            sys.stdout = sys.__stdout__
+            output = captured_output.getvalue()
+            self.assertEqual(output.count("Account: ACC001"), 1)
+            self.assertIn("| 20230331     |                  | I    | 1.70  | 1001.70 |", output)
+            self.assertIn("| 20230415     | 20230415-01      | W    | 200.00  | 801.70 |", output)
+            self.assertIn("| 20230430     |", output)
+            self.assertIn("Invalid range. End month must not be before start month", output)
+
+    def test_print_monthly_statement_invalid_input(self):
+        inputs = ["ACC001", "ACC001 202313", "ACC001 202301-2023", ""]
+        with patch("builtins.input", side_effect=inputs):
+            captured_output = StringIO()
+            sys.stdout = captured_output
+            self.bank.print_monthly_statement()
+            sys.stdout = sys.__stdout__
+            output = captured_output.getvalue()
+            self.assertIn("Invalid input. Must be <Account> <Year><Month>.", output)
+            self.assertIn("Invalid date format. Must be YYYYMM\n", output)
+            self.assertIn("Invalid date format. Must be YYYYMM-YYYYMM", output)
+
     def test_print_monthly_statement_invalid_account(self):
         # Test statement generation for a non-existent account.
         inputs = ["abc 202303", ""]
@@ -133,6 +176,61 @@ class TestBank(unittest.TestCase):
             output = captured_output.getvalue()
             self.assertIn("Account abc not found", output)
 
+    # ----------------------------
+    # Tests for run
+    # ----------------------------
+    def test_run_stats(self):
+        inputs = ["s", "q"]
+        with patch("builtins.input", side_effect=inputs):
+            captured_output = StringIO()
+            sys.stdout = captured_output
+            self.bank.run()
+            sys.stdout = sys.__stdout__
+            output = captured_output.getvalue()
+            self.assertIn("[S] Stats", output)
+            self.assertIn("Statement cache: {'size': 0", output)
+
+    def test_retroactive_rule_recomputes_affected_months_only(self):
+        self.bank.add_interest_rule("20230101", "RULE01", "1")
+        self.bank.add_interest_rule("20230310", "RULE03", "3")
+        self.bank.add_transaction("20230105", "ACC001", "D", "1000")
+        # empty before the window and back to zero inside it
+        self.bank.add_transaction("20230101", "ACC002", "D", "50")
+        self.bank.add_transaction("20230110", "ACC002", "W", "50")
+        # opens after the window
+        self.bank.add_transaction("20230320", "ACC003", "D", "500")
+        for month in range(1, 5):
+            self.bank.compute_month_interest(2023, month)
+        self.bank.add_interest_rule("20230215", "RULE02", "2")
+        report = self.bank.last_recompute
+        # the rule only applies 20230215..20230309
+        self.assertEqual(report.months, [(2023, 2), (2023, 3)])
+        self.assertEqual(report.accounts_checked, 6)
+        self.assertEqual(report.recomputed, 2)
+        self.assertEqual(
+            [change[:3] for change in report.changes],
+            [(2023, 2, "ACC001"), (2023, 3, "ACC001")],
+        )
+        for month in range(1, 5):
+            stored = dict(self.bank.interest_results[(2023, month)])
+            self.assertEqual(stored, self.bank.compute_month_interest(2023, month))
+
+    def test_transaction_drops_stale_interest_results(self):
+        self.bank.add_interest_rule("20230101", "RULE01", "2")
+        self.bank.add_transaction("20230101", "ACC001", "D", "1000")
+        self.bank.add_transaction("20230101", "ACC002", "D", "1000")
+        for month in (1, 2, 3):
+            self.bank.compute_month_interest(2023, month)
+        self.bank.add_transaction("20230210", "ACC001", "D", "100000")
+        self.assertIn("ACC001", self.bank.interest_results[(2023, 1)])
+        self.assertNotIn("ACC001", self.bank.interest_results[(2023, 2)])
+        self.assertNotIn("ACC001", self.bank.interest_results[(2023, 3)])
+        self.assertIn("ACC002", self.bank.interest_results[(2023, 3)])
+        # a later rule reports only what the rule itself changed
+        self.bank.add_interest_rule("20230301", "RULE02", "3")
+        report = self.bank.last_recompute
+        self.assertEqual([change[2] for change in report.changes], ["ACC002"])
+
     # ----------------------------
     # Tests for input_interest
     # ----------------------------
@@ -172,3 +270,73 @@ class TestBank(unittest.TestCase):
             output = captured_output.getvalue()
             self.assertIn("Rate must be between 0 and 100", output)
             self.assertIn("Invalid rate", output)
+
+    # ----------------------------
+    # Tests for ingest_stream
+    # ----------------------------
+    def test_ingest_stream_transactions(self):
+        # Valid lines are applied silently, rejects are reported with line numbers.
+        lines = [
+            "20230301 ACC001 D 1000\n",
+            "20230302 ACC001 W 5000\n",
+            "\n",
+            "20230303 ACC002 D\n",
+            "20230304 ACC002 D 50.5\n",
+        ]
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        report = self.bank.ingest_stream(lines, "T")
+        sys.stdout = sys.__stdout__
+        self.assertEqual(captured_output.getvalue(), "")
+        self.assertEqual(report.accepted, 2)
+        self.assertEqual(
+            [(line_no, message) for line_no, _, message in report.rejects],
+            [
+                (2, "Insufficient funds."),
+                (4, "Invalid input. Must be <Date> <Account> <Type> <Amount>."),
+            ],
+        )
+        self.assertEqual(len(self.bank.accounts["ACC001"].transactions), 1)
+        self.assertEqual(len(self.bank.accounts["ACC002"].transactions), 1)
+
+    def test_ingest_stream_rejected_first_transaction_creates_no_account(self):
+        report = self.bank.ingest_stream(["20230301 ACC001 W 10"], "T")
+        self.assertEqual(len(report.rejects), 1)
+        self.assertNotIn("ACC001", self.bank.accounts)
+
+    def test_ingest_stream_interest_rules(self):
+        lines = ["20230101 RULE01 1.95", "20230101 RULE02 2.00", "20230520 RULE03 0"]
+        report = self.bank.ingest_stream(lines, "I")
+        self.assertEqual(report.accepted, 2)
+        self.assertEqual(report.rejects[0][0], 3)
+        self.assertEqual(len(self.bank.interest_rules), 1)
+        self.assertEqual(self.bank.interest_rules[0].ruleId, "RULE02")
+        self.assertIn("3 lines, 2 accepted, 1 rejected", report.summary())
+
+    # ----------------------------
+    # Tests for compute_month_interest
+    # ----------------------------
+    def load_random_accounts(self):
+        add_random_transactions(self.bank, 300, accounts=40, months=(5, 6, 7), seed=6)
+        for date_str, rate_str in [("20230101", "1.95"), ("20230520", "1.90"), ("20230615", "2.20")]:
+            self.bank.add_interest_rule(date_str, "RULE", rate_str)
+
+    def assert_matches_per_account(self, year, month):
+        result = self.bank.compute_month_interest(year, month)
+        self.assertEqual(set(result), set(self.bank.accounts))
+        for account_id, account in self.bank.accounts.items():
+            expected = account.get_monthly_interest(year, month, self.bank.interest_rules)
+            self.assertEqual(result[account_id], expected, account_id)
+
+    def test_compute_month_interest_matches_per_account(self):
+        self.load_random_accounts()
+        for month in (5, 6, 7, 8):
+            self.assert_matches_per_account(2023, month)
+
+    def test_compute_month_interest_without_numpy(self):
+        self.load_random_accounts()
+        with patch("utils.interest_engine.numpy", None):
+            self.assert_matches_per_account(2023, 6)
+
+    def test_compute_month_interest_no_accounts(self):
+        self.assertEqual(self.bank.compute_month_interest(2023, 6), {})
@@ -0,0 +1,48 @@
+from benchmarks.generators import rule_lines, transaction_lines
+from benchmarks.run import main, trace_peak
+from benchmarks import parsing
+from classes.bank import Bank
+
+
+def test_generators_are_seeded():
+    assert list(transaction_lines(200, seed=1)) == list(transaction_lines(200, seed=1))
+    assert list(transaction_lines(200, seed=1)) != list(transaction_lines(200, seed=2))
+    assert list(rule_lines(20, seed=1)) == list(rule_lines(20, seed=1))
+
+
+def test_generated_lines_are_valid_input():
+    # Only withdrawals can be rejected (insufficient funds), never the format.
+    bank = Bank()
+    report = bank.ingest_stream(transaction_lines(2000, accounts=20, seed=3), "T")
+    assert report.accepted > 1000
+    assert {message for _, _, message in report.rejects} <= {"Insufficient funds."}
+    assert bank.ingest_stream(rule_lines(50, seed=3), "I").rejects == []
+
+
+def test_run_writes_json(tmp_path):
+    out = tmp_path / "results.json"
+    report = main(["--sizes", "200", "--accounts", "10", "--queries", "50", "--out", str(out)])
+    assert out.exists()
+    assert {result["scenario"] for result in report["results"]} == {
+        "add_interest_rule",
+        "add_transaction",
+        "get_balance_before_date",
+        "get_transactions_in_month",
+        "generate_monthly_statement",
+    }
+    # timed untraced, with the peak memory from a separate traced sample
+    assert all(result["memory_sample"] == 200 for result in report["results"])
+    assert all(result["peak_memory_kb"] >= 0 for result in report["results"])
+
+
+def test_trace_peak_reports_peak_memory_per_call():
+    large = trace_peak("large", 1, [lambda: bytearray(4 << 20)])
+    small = trace_peak("small", 1, [lambda: None])
+    assert large["peak_memory_kb"] >= 4096
+    assert small["peak_memory_kb"] < 4096
+
+
+def test_parsing_benchmark_runs():
+    result = parsing.main(["--lines", "500"])
+    assert result["lines"] == 500
+    assert result["speedup"] > 0
@@ -0,0 +1,106 @@
+import gc
+import os
+import weakref
+from classes.bank import Bank
+from classes.cold_store import COLD, ColdAccountStore, EvictingAccountMap
+from classes.persistence import BankStore
+from tests.conftest import add_random_transactions, statements
+
+
+def fill(bank):
+    add_random_transactions(bank, 600, accounts=30, months=range(1, 7), seed=21)
+    bank.add_interest_rule("20230101", "RULE01", "1.95")
+
+
+# -------------------------
+# Tests for ColdAccountStore / EvictingAccountMap
+# -------------------------
+def test_evicting_bank_matches_in_memory_bank(tmp_path):
+    bank = Bank(memory_budget=60000, cold_path=str(tmp_path / "accounts.seg"))
+    expected = Bank()
+    fill(bank)
+    fill(expected)
+    stats = bank.accounts.stats()
+    assert stats["evictions"] > 0 and stats["fault_ins"] > 0
+    assert stats["resident_bytes"] <= 60000
+    assert len(bank.accounts) == len(expected.accounts) == 30
+    assert statements(bank) == statements(expected)
+
+
+def test_evicted_account_faults_back_in(tmp_path):
+    accounts = EvictingAccountMap(ColdAccountStore(str(tmp_path / "accounts.seg")), budget=1)
+    bank = Bank()
+    bank.accounts = accounts
+    bank.add_transaction("20230101", "AC001", "D", "100")
+    first = accounts["AC001"]
+    bank.add_transaction("20230102", "AC002", "D", "50")
+    # AC001 was least recently used and no longer fits
+    assert accounts.shards[accounts.shard("AC001")]["AC001"] is COLD
+    assert first.evicted
+    assert "AC001" in accounts
+    success, _ = bank.add_transaction("20230103", "AC001", "W", "30")
+    assert success
+    account = accounts["AC001"]
+    assert account is not first
+    assert account.balance_as_of("20230103") == 70
+    assert account.transactions[-1].txn_id == "20230103-01"
+    assert accounts.stats()["fault_ins"] >= 1
+
+
+def test_unchanged_account_is_not_rewritten(tmp_path):
+    store = ColdAccountStore(str(tmp_path / "accounts.seg"))
+    accounts = EvictingAccountMap(store, budget=1)
+    bank = Bank()
+    bank.accounts = accounts
+    bank.add_transaction("20230101", "AC001", "D", "100")
+    bank.add_transaction("20230101", "AC002", "D", "100")
+    record = store.index["AC001"]
+    accounts["AC001"]  # faults AC001 in, evicts AC002
+    accounts["AC002"]  # evicts the unchanged AC001 again
+    assert store.index["AC001"] == record
+
+
+def test_snapshot_and_restore_with_evicted_accounts(tmp_path):
+    bank = Bank(memory_budget=60000, cold_path=str(tmp_path / "cold" / "accounts.seg"))
+    bank.store = BankStore(str(tmp_path / "data"))
+    fill(bank)
+    bank.store.checkpoint(bank)
+    bank.add_transaction("20230630", "AC001", "D", "1")
+    bank.store.close()
+    restored = Bank(memory_budget=60000, cold_path=str(tmp_path / "cold2" / "accounts.seg"))
+    store = BankStore(str(tmp_path / "data"))
+    store.load(restored)
+    store.close()
+    assert statements(restored) == statements(bank)
+
+
+def test_statement_cache_does_not_keep_evicted_accounts(tmp_path):
+    bank = Bank(memory_budget=1, cold_path=str(tmp_path / "accounts.seg"))
+    bank.add_transaction("20230101", "AC001", "D", "100")
+    account = weakref.ref(bank.accounts["AC001"])
+    bank.statement_cache.get(account(), 2023, 1, bank.interest_rules)
+    bank.add_transaction("20230101", "AC002", "D", "100")  # evicts AC001
+    gc.collect()
+    assert account() is None
+    statement, _ = bank.statement_cache.get(bank.accounts["AC001"], 2023, 1, bank.interest_rules)
+    assert "| 20230101     | 20230101-01      | D    | 100.00  | 100.00 |" in statement
+
+
+def test_temporary_store_is_removed_on_close():
+    bank = Bank(memory_budget=1)
+    bank.add_transaction("20230101", "AC001", "D", "100")
+    bank.add_transaction("20230101", "AC002", "D", "100")
+    path = bank.accounts.store.path
+    assert os.path.exists(path)
+    bank.close()
+    assert not os.path.exists(path)
+
+
+def test_nbytes_counts_accruals(tmp_path):
+    bank = Bank()
+    bank.add_interest_rule("20230101", "RULE01", "2")
+    bank.add_transaction("20230101", "AC001", "D", "100")
+    account = bank.accounts["AC001"]
+    before = account.nbytes()
+    account.calculate_interest(2023, 1, bank.interest_rules)
+    assert account.nbytes() > before
@@ -0,0 +1,48 @@
+import pytest
+from benchmarks.differential import main, run
+from classes.account import Account
+
+
+class OffByOneCentAccount(Account):
+    # an "optimization" that loses a cent once the balance passes 1000.00
+    def get_balance_before_date(self, year, month):
+        balance = super().get_balance_before_date(year, month)
+        return balance - 0.01 if balance > 1000 else balance
+
+
+class NoFundsAccount(Account):
+    # a funds check that rejects every withdrawal
+    def has_funds(self, day, cents):
+        return False
+
+
+def test_engine_matches_reference():
+    report = run(seeds=3, transactions=300, rules=10)
+    assert report.divergence is None
+    assert report.transactions == 900
+    assert report.comparisons > 900
+    assert report.stricter_rejects > 0
+
+
+def test_first_divergence_is_reported():
+    report = run(seeds=3, transactions=300, rules=10, engine=OffByOneCentAccount)
+    divergence = report.divergence
+    assert divergence is not None
+    assert divergence.operation == "get_balance_before_date"
+    assert float(divergence.expected) - float(divergence.actual) == pytest.approx(0.01)
+    assert "seed 0" in str(divergence)
+
+
+def test_wrongly_rejected_withdrawal_is_reported():
+    report = run(seeds=3, transactions=300, rules=10, engine=NoFundsAccount)
+    divergence = report.divergence
+    assert divergence is not None
+    assert divergence.operation == "add_transaction"
+    assert divergence.arguments[2] == "W"
+    assert divergence.actual == (False, "Insufficient funds. \n")
+
+
+def test_main_prints_summary(capsys):
+    report = main(["--seeds", "1", "--transactions", "100"])
+    assert report.divergence is None
+    assert "no divergence" in capsys.readouterr().out
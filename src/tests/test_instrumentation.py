@@ -0,0 +1,35 @@
+import pytest
+from classes.account import Account
+from utils import instrumentation
+
+
+@pytest.fixture
+def enabled():
+    """Fixture turning instrumentation on with empty stats for one test."""
+    instrumentation.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_disabled_records_nothing():
+    instrumentation.reset()
+    account = Account("AC001")
+    account.add_transaction("20250101", "AC001", "D", "100")
+    assert instrumentation.stats()["timings"] == {}
+
+
+def test_timers_and_counters(enabled):
+    account = Account("AC001")
+    account.add_transaction("20250101", "AC001", "D", "100")
+    account.add_transaction("20250102", "AC001", "W", "50")
+    account.add_transaction("20250103", "AC001", "W", "500")
+    account.generate_monthly_statement(2025, 1, [])
+    stats = instrumentation.stats()
+    assert stats["timings"]["account.add_transaction"]["calls"] == 3
+    assert stats["timings"]["account.has_funds"]["calls"] == 2
+    assert stats["timings"]["ledger.insert"]["calls"] == 2
+    assert stats["counters"]["interest.transactions_scanned"] == 2
+    assert stats["counters"]["statement.transactions_scanned"] == 2
+    assert "| account.add_transaction" in instrumentation.format_stats()
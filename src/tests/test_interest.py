@@ -0,0 +1,61 @@
+import pytest
+from classes.interest import Interest, InterestRuleTimeline
+
+
+@pytest.fixture
+def timeline():
+    """Fixture to create a timeline with rules on 20230101, 20230520 and 20230615."""
+    timeline = InterestRuleTimeline()
+    timeline.upsert(Interest("20230615", "RULE03", 2.20))
+    timeline.upsert(Interest("20230101", "RULE01", 1.95))
+    timeline.upsert(Interest("20230520", "RULE02", 1.90))
+    return timeline
+
+
+# -------------------------
+# Tests for InterestRuleTimeline
+# -------------------------
+def test_upsert_keeps_rules_sorted(timeline):
+    assert [rule.ruleId for rule in timeline] == ["RULE01", "RULE02", "RULE03"]
+    assert timeline.dates == ["20230101", "20230520", "20230615"]
+
+
+def test_upsert_same_day_keeps_latest(timeline):
+    timeline.upsert(Interest("20230520", "RULE04", 3.00))
+    assert len(timeline) == 3
+    assert timeline[1].ruleId == "RULE04"
+    assert timeline.rate_at("20230520") == 3.00
+
+
+def test_rate_at(timeline):
+    assert timeline.rate_at("20221231") == 0
+    assert timeline.rate_at("20230101") == 1.95
+    assert timeline.rate_at("20230614") == 1.90
+    assert timeline.rate_at("20991231") == 2.20
+
+
+def test_segments_for_month(timeline):
+    assert timeline.segments_for_month(2023, 6) == ((1, 1.90), (15, 2.20))
+    assert timeline.segments_for_month(2023, 7) == ((1, 2.20),)
+    assert timeline.segments_for_month(2022, 12) == ((1, 0),)
+
+
+def test_segments_for_month_invalidation(timeline):
+    may = timeline.segments_for_month(2023, 5)
+    june = timeline.segments_for_month(2023, 6)
+    timeline.upsert(Interest("20230610", "RULE04", 2.00))
+    # months before the rule keep their cached segments
+    assert timeline.segments_for_month(2023, 5) is may
+    assert timeline.segments_for_month(2023, 6) is not june
+    assert timeline.segments_for_month(2023, 6) == ((1, 1.90), (10, 2.00), (15, 2.20))
+
+
+def test_weights_for_month(timeline):
+    weights = timeline.weights_for_month(2023, 6)
+    # 14 days at 1.90% then 16 days at 2.20%
+    assert weights[1] == pytest.approx((14 * 1.90 + 16 * 2.20) / 100)
+    assert weights[15] == pytest.approx(16 * 2.20 / 100)
+    assert weights[31] == 0
+    assert timeline.weights_for_month(2023, 6) is weights
+    timeline.upsert(Interest("20230610", "RULE04", 2.00))
+    assert timeline.weights_for_month(2023, 6) is not weights
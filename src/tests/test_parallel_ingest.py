@@ -0,0 +1,44 @@
+import pytest
+from benchmarks.generators import transaction_lines
+from classes.bank import Bank
+from classes.parallel_ingest import ingest_parallel
+from classes.persistence import BankStore, read_journal
+from tests.conftest import statements
+
+
+@pytest.fixture
+def lines():
+    """Fixture with 600 generated lines over 40 accounts, plus a few bad ones."""
+    lines = list(transaction_lines(600, accounts=40, backdated_ratio=0.2, seed=19))
+    lines[10:10] = ["20230101 AC001 D\n", "\n", "20231301 AC002 D 10\n"]
+    return lines
+
+
+# -------------------------
+# Tests for ingest_parallel
+# -------------------------
+@pytest.mark.parametrize("workers", [1, 3])
+def test_ingest_parallel_matches_serial(lines, workers):
+    serial, parallel = Bank(), Bank()
+    # accounts that already hold transactions keep their history and txn ids
+    for bank in (serial, parallel):
+        bank.add_transaction("20230101", "AC001", "D", "10")
+    expected = serial.ingest_stream(lines, source="txns")
+    # small batches so accounts carry over from one batch to the next
+    report = ingest_parallel(parallel, lines, workers, source="txns", batch_size=250)
+    assert statements(parallel) == statements(serial)
+    assert (report.lines_read, report.accepted) == (expected.lines_read, expected.accepted)
+    assert report.format_rejects() == expected.format_rejects()
+    assert (11, "20230101 AC001 D", "Invalid input. Must be <Date> <Account> <Type> <Amount>.") in report.rejects
+
+
+def test_ingest_parallel_journals_in_input_order(lines, tmp_path):
+    bank = Bank()
+    bank.store = BankStore(str(tmp_path))
+    report = ingest_parallel(bank, lines, 2, batch_size=250)
+    bank.store.close()
+    records = [parts for _, kind, parts in read_journal(str(tmp_path / "journal.txt"))]
+    assert len(records) == report.accepted
+    restored = Bank()
+    restored.ingest_stream(" ".join(parts) for parts in records)
+    assert statements(restored) == statements(bank)
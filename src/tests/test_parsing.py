@@ -0,0 +1,80 @@
+import pytest
+from utils.parsing import (
+    INVALID_AMOUNT,
+    TOO_MANY_DECIMALS,
+    parse_cents,
+    parse_date,
+    parse_type,
+    parse_year_month,
+)
+from main import build_parser
+from utils.utils import validate_date
+
+
+# -------------------------
+# Tests for parse_date / parse_year_month
+# -------------------------
+@pytest.mark.parametrize(
+    "date_str", ["20230101", "20231231", "20240229", "20000229", "00010101"]
+)
+def test_parse_date_valid(date_str):
+    assert parse_date(date_str) == int(date_str)
+
+
+@pytest.mark.parametrize(
+    "date_str",
+    ["20230229", "19000229", "20231301", "20230100", "20230431", "00000101", "2023011", "202301011", "2023-1-1", "abcdefgh", "２０２３０１０１", ""],
+)
+def test_parse_date_invalid(date_str):
+    assert parse_date(date_str) is None
+
+
+def test_parse_date_agrees_with_strptime_on_every_day_of_a_leap_cycle():
+    for year in (2023, 2024, 2100):
+        for month in range(1, 13):
+            for day in range(0, 33):
+                date_str = f"{year}{month:02}{day:02}"
+                assert (parse_date(date_str) is not None) == validate_date(date_str)
+
+
+def test_parse_year_month():
+    assert parse_year_month("202306") == (2023, 6)
+    assert parse_year_month("202313") is None
+    assert parse_year_month("202300") is None
+    assert parse_year_month("20236") is None
+    assert parse_year_month("2023-6") is None
+
+
+# -------------------------
+# Tests for parse_type / parse_cents
+# -------------------------
+def test_parse_type():
+    assert [parse_type(t) for t in ("D", "d", "W", "w", "X", "DW", "")] == ["D", "D", "W", "W", None, None, None]
+
+
+@pytest.mark.parametrize(
+    "amount_str, cents",
+    [("100", 10000), ("100.5", 10050), ("0.07", 7), (".5", 50), ("5.", 500), ("-5", -500), ("+1.25", 125), ("0", 0)],
+)
+def test_parse_cents_valid(amount_str, cents):
+    assert parse_cents(amount_str) == (cents, None)
+
+
+@pytest.mark.parametrize("amount_str", ["abc", "", ".", "-", "1e3", "inf", "nan", "1.2.3", "1,000", "1_000", "--5", "١٠"])
+def test_parse_cents_not_a_number(amount_str):
+    assert parse_cents(amount_str) == (None, INVALID_AMOUNT)
+
+
+def test_parse_cents_more_than_two_decimals():
+    assert parse_cents("10.005") == (None, TOO_MANY_DECIMALS)
+
+
+@pytest.mark.parametrize("month", ["20236", "202313", "2023-06"])
+def test_cli_rejects_invalid_months(month, capsys):
+    with pytest.raises(SystemExit):
+        build_parser().parse_args(["statements", month])
+    assert "must be YYYYMM" in capsys.readouterr().err
+
+
+def test_cli_parses_month():
+    assert build_parser().parse_args(["export", "202306", "--csv", "x.csv"]).month == (2023, 6)
@@ -0,0 +1,130 @@
+import os
+import threading
+import pytest
+from classes.bank import Bank
+from classes.persistence import BankStore, read_journal
+from tests.conftest import statements
+
+
+def open_bank(data_dir, **options):
+    bank = Bank()
+    store = BankStore(str(data_dir), **options)
+    store.load(bank)
+    return bank, store
+
+
+def fill(bank):
+    bank.add_interest_rule("20230101", "RULE01", "1.95")
+    bank.add_transaction("20230505", "AC001", "D", "100")
+    bank.add_transaction("20230601", "AC001", "D", "150.10")
+    bank.add_transaction("20230626", "AC001", "W", "20")
+    bank.add_transaction("20230626", "AC002", "D", "5")
+    bank.add_transaction("20230626", "AC002", "W", "50")  # rejected, not journaled
+    bank.add_interest_rule("20230615", "RULE03", "2.20")
+
+
+# -------------------------
+# Tests for BankStore
+# -------------------------
+def test_restart_replays_journal(tmp_path):
+    bank, store = open_bank(tmp_path)
+    fill(bank)
+    store.close()
+    assert len(list(read_journal(store.journal_path))) == 6
+    restored, store = open_bank(tmp_path)
+    store.close()
+    assert statements(restored) == statements(bank)
+    assert [rule.ruleId for rule in restored.interest_rules] == ["RULE01", "RULE03"]
+
+
+@pytest.mark.parametrize("snapshot_every", [1, 3, 100])
+def test_restart_from_snapshot_and_journal_tail(tmp_path, snapshot_every):
+    bank, store = open_bank(tmp_path, snapshot_every=snapshot_every)
+    fill(bank)
+    store.close()
+    restored, store = open_bank(tmp_path)
+    # new transactions keep their running numbers after a restart
+    restored.add_transaction("20230626", "AC001", "D", "1")
+    store.close()
+    assert restored.accounts["AC001"].transactions[-1].txn_id == "20230626-02"
+    again, store = open_bank(tmp_path)
+    store.close()
+    assert statements(again) == statements(restored)
+
+
+def test_snapshot_only(tmp_path):
+    bank, store = open_bank(tmp_path)
+    fill(bank)
+    store.checkpoint(bank)
+    store.close()
+    os.remove(store.journal_path)
+    restored, store = open_bank(tmp_path)
+    store.close()
+    assert statements(restored) == statements(bank)
+
+
+def test_older_snapshot_format_falls_back_to_journal(tmp_path):
+    bank, store = open_bank(tmp_path)
+    fill(bank)
+    store.close()
+    with open(store.snapshot_path, "wb") as snapshot:
+        snapshot.write(b"BANKSNP2" + bytes(16))
+    restored, store = open_bank(tmp_path)
+    store.close()
+    assert statements(restored) == statements(bank)
+
+
+def test_replay_reports_records_the_bank_rejects(tmp_path):
+    # journaled by an older version that still accepted exponent amounts
+    with open(tmp_path / "journal.txt", "wb") as journal:
+        journal.write(b"T 20230601 AC001 D 100\nT 20230602 AC001 D 1e3\nT 20230603 AC001 W 500\n")
+    bank = Bank()
+    store = BankStore(str(tmp_path))
+    report = store.load(bank)
+    store.close()
+    assert report.accepted == 1
+    assert [(line, message) for _, line, message in report.rejects] == [
+        ("T 20230602 AC001 D 1e3", "Invalid amount. Must be a number."),
+        ("T 20230603 AC001 W 500", "Insufficient funds."),
+    ]
+    assert report.rejects[0][0] == len(b"T 20230601 AC001 D 100\n")
+
+
+def test_torn_journal_record_is_dropped(tmp_path):
+    bank, store = open_bank(tmp_path)
+    fill(bank)
+    store.close()
+    with open(store.journal_path, "ab") as journal:
+        journal.write(b"T 20230627 AC001 D 1")
+    restored, store = open_bank(tmp_path)
+    restored.add_transaction("20230628", "AC001", "D", "2")
+    store.close()
+    again, store = open_bank(tmp_path)
+    store.close()
+    assert [txn.txn_id for txn in again.accounts["AC001"].transactions][-1] == "20230628-01"
+    assert statements(again) == statements(restored)
+
+
+def test_snapshots_taken_while_threads_write(tmp_path):
+    # Snapshots taken mid-stream must not lose or double-apply any record.
+    bank, store = open_bank(tmp_path, sync_every=7, snapshot_every=25)
+
+    def feed(index):
+        for day in range(1, 29):
+            bank.add_transaction(f"202306{day:02}", f"AC{index:03}", "D", "1.00")
+            bank.add_transaction(f"202306{day:02}", "SHARED", "D", "0.01")
+
+    workers = [threading.Thread(target=feed, args=(index,)) for index in range(6)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    store.close()
+    restored, store = open_bank(tmp_path)
+    store.close()
+    assert sorted(restored.accounts) == sorted(bank.accounts)
+    for account_id, account in bank.accounts.items():
+        assert (
+            restored.accounts[account_id].generate_all_statements()
+            == account.generate_all_statements()
+        )
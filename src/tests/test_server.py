@@ -0,0 +1,106 @@
+import asyncio
+import threading
+from classes.bank import Bank
+from classes.server import BankServer
+from benchmarks.loadgen import main as loadgen
+
+
+async def exchange(bank, payload):
+    # send payload in one write (pipelined) and read until the server closes
+    server = await BankServer(bank).start("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(payload if isinstance(payload, bytes) else payload.encode())
+    await writer.drain()
+    response = (await reader.read()).decode()
+    writer.close()
+    server.close()
+    await server.wait_closed()
+    return response
+
+
+def test_pipelined_session():
+    bank = Bank()
+    payload = (
+        "I 20230101 RULE01 1.95\n"
+        "T 20230601 AC001 D 150\n"
+        "T 20230626 AC001 W 500\n"
+        "P AC001 202306\n"
+        "P AC002 202306\n"
+        "X\n"
+        "Q\n"
+        "T 20230627 AC001 D 1\n"
+    )
+    response = asyncio.run(exchange(bank, payload))
+    assert response == (
+        "OK 2\n"
+        "| Date     | RuleId | Rate (%) |\n"
+        "| 20230101 | RULE01 | 1.95     |\n"
+        "OK 3\n"
+        "Account: AC001 \n"
+        "| Date         | Txn Id           | Type | Amount | Balance | \n"
+        "| 20230601     | 20230601-01      | D    | 150.00  | 150.00 | \n"
+        "ERR Insufficient funds.\n"
+        "OK 4\n"
+        "Account: AC001 \n"
+        "| Date         | Txn Id           | Type | Amount | Balance | \n"
+        "| 20230601     | 20230601-01      | D    | 150.00  | 150.00 | \n"
+        "| 20230630     |                  | I    | 0.24  | 150.24 | \n"
+        "ERR Account AC002 not found\n"
+        "ERR Invalid choice. Must be T, I, P or Q.\n"
+        "OK 0\n"
+    )
+    # nothing after Q is processed
+    assert len(bank.accounts["AC001"].transactions) == 1
+
+
+def test_undecodable_and_oversized_lines_get_err():
+    bank = Bank()
+    payload = b"T 20230601 AC\xff1 D 150\nT 20230601 AC001 D 150\n" + b"P" * (70 * 1024) + b"\n"
+    response = asyncio.run(exchange(bank, payload))
+    lines = response.splitlines()
+    assert lines[0] == "ERR Invalid input. Must be UTF-8 text."
+    assert lines[1] == "OK 3"
+    assert lines[-1] == "ERR Line too long."
+    assert len(bank.accounts["AC001"].transactions) == 1
+
+
+def test_slow_bank_call_does_not_stall_other_sessions():
+    bank = Bank()
+    release = threading.Event()
+    add_interest_rule = bank.add_interest_rule
+
+    def blocked_rule(*parts):
+        release.wait(5)
+        return add_interest_rule(*parts)
+
+    bank.add_interest_rule = blocked_rule
+
+    async def scenario():
+        server = await BankServer(bank).start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        slow_reader, slow_writer = await asyncio.open_connection("127.0.0.1", port)
+        slow_writer.write(b"I 20230101 RULE01 1.95\n")
+        await slow_writer.drain()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"T 20230601 AC001 D 150\n")
+        await writer.drain()
+        # answered while the other session's Bank call is still blocked
+        first = await asyncio.wait_for(reader.readline(), 5)
+        release.set()
+        slow = await asyncio.wait_for(slow_reader.readline(), 5)
+        for stream in (writer, slow_writer):
+            stream.close()
+        server.close()
+        await server.wait_closed()
+        return first, slow
+
+    first, slow = asyncio.run(scenario())
+    assert first == b"OK 3\n"
+    assert slow == b"OK 2\n"
+
+
+def test_loadgen_against_in_process_server():
+    total, failed = loadgen(["--clients", "5", "--requests", "40", "--pipeline", "8"])
+    assert total == 200
+    assert failed < total
@@ -0,0 +1,36 @@
+import pytest
+from classes.bank import Bank
+from classes.statement_batch import write_statements
+from tests.conftest import add_random_transactions
+
+
+@pytest.fixture
+def bank():
+    """Fixture to create a bank with 25 random accounts and two interest rules."""
+    bank = Bank()
+    add_random_transactions(bank, 200, accounts=25, months=(5, 6), seed=8)
+    bank.add_interest_rule("20230101", "RULE01", "1.95")
+    bank.add_interest_rule("20230615", "RULE02", "2.20")
+    return bank
+
+
+def expected_output(bank, year, month):
+    return "".join(
+        account.generate_monthly_statement(year, month, bank.interest_rules) + "\n"
+        for account in bank.accounts.values()
+    )
+
+
+# -------------------------
+# Tests for write_statements
+# -------------------------
+@pytest.mark.parametrize("workers", [1, 2])
+def test_write_statements_matches_serial(bank, tmp_path, workers):
+    paths = write_statements(bank, 2023, 6, tmp_path, workers=workers, chunk_size=10)
+    assert [path.rsplit("_", 1)[1] for path in paths] == ["0000.txt", "0001.txt", "0002.txt"]
+    output = "".join(open(path).read() for path in paths)
+    assert output == expected_output(bank, 2023, 6)
+
+
+def test_write_statements_no_accounts(tmp_path):
+    assert write_statements(Bank(), 2023, 6, tmp_path) == []
@@ -0,0 +1,76 @@
+import pytest
+from classes.account import Account
+from classes.interest import Interest, InterestRuleTimeline
+from classes.statement_cache import StatementCache
+
+
+@pytest.fixture
+def account():
+    """Fixture to create an account with transactions in March and May 2023."""
+    account = Account("AC001")
+    account.add_transaction("20230301", "AC001", "D", "1000")
+    account.add_transaction("20230515", "AC001", "W", "200")
+    return account
+
+
+@pytest.fixture
+def rules():
+    rules = InterestRuleTimeline()
+    rules.upsert(Interest("20230101", "RULE01", 1.95))
+    return rules
+
+
+# -------------------------
+# Tests for StatementCache
+# -------------------------
+def test_get_hit_and_miss(account, rules):
+    cache = StatementCache()
+    first = cache.get(account, 2023, 3, rules)
+    assert first == account.build_monthly_statement(2023, 3, rules)
+    assert cache.get(account, 2023, 3, rules) == first
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_transaction_only_invalidates_later_months(account, rules):
+    cache = StatementCache()
+    cache.get(account, 2023, 3, rules)
+    cache.get(account, 2023, 5, rules)
+    account.add_transaction("20230410", "AC001", "D", "100")
+    cache.get(account, 2023, 3, rules)
+    statement, _ = cache.get(account, 2023, 5, rules)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["invalidations"] == 1
+    assert statement == account.generate_monthly_statement(2023, 5, rules)
+
+
+def test_rule_change_only_invalidates_later_months(account, rules):
+    cache = StatementCache()
+    cache.get(account, 2023, 3, rules)
+    cache.get(account, 2023, 5, rules)
+    rules.upsert(Interest("20230501", "RULE02", 3.00))
+    cache.get(account, 2023, 3, rules)
+    _, interest = cache.get(account, 2023, 5, rules)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["invalidations"] == 1
+    assert interest == account.get_monthly_interest(2023, 5, rules)
+
+
+def test_replaced_account_is_not_served_from_cache(account, rules):
+    cache = StatementCache()
+    cache.get(account, 2023, 3, rules)
+    other = Account("AC001")
+    other.add_transaction("20230301", "AC001", "D", "5")
+    statement, _ = cache.get(other, 2023, 3, rules)
+    assert statement == other.generate_monthly_statement(2023, 3, rules)
+
+
+def test_eviction(account, rules):
+    cache = StatementCache(maxsize=2)
+    for month in (3, 4, 5):
+        cache.get(account, 2023, month, rules)
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+    # March was the least recently used entry
+    cache.get(account, 2023, 3, rules)
+    assert cache.stats()["misses"] == 4
@@ -0,0 +1,87 @@
+import csv
+import pytest
+from classes.bank import Bank
+from classes import statement_export
+from classes.statement_export import RECORD, export_month, read_records
+
+
+@pytest.fixture
+def bank():
+    """Fixture to create a bank with two accounts and two interest rules."""
+    bank = Bank()
+    bank.add_interest_rule("20230101", "RULE01", "1.95")
+    bank.add_interest_rule("20230615", "RULE02", "2.20")
+    bank.add_transaction("20230505", "AC001", "D", "100")
+    bank.add_transaction("20230601", "AC001", "D", "150")
+    bank.add_transaction("20230626", "AC001", "W", "20")
+    bank.add_transaction("20230626", "AC001", "W", "100")
+    bank.add_transaction("20230610", "AC002", "D", "0.5")
+    return bank
+
+
+# -------------------------
+# Tests for export_month
+# -------------------------
+def test_export_month_csv_matches_statement(bank, tmp_path):
+    path = tmp_path / "202306.csv"
+    assert export_month(bank, 2023, 6, csv_path=str(path)) == 6
+    with open(path) as export:
+        rows = list(csv.reader(export))
+    assert rows[0] == ["account", "date", "txn_id", "type", "amount", "balance"]
+    # accounts come out in map order, rows keep their order within an account
+    rows = [row for row in rows[1:] if row[0] == "AC001"] + [row for row in rows[1:] if row[0] == "AC002"]
+    assert rows[:4] == [
+        ["AC001", "20230601", "20230601-01", "D", "150.00", "250.00"],
+        ["AC001", "20230626", "20230626-01", "W", "20.00", "230.00"],
+        ["AC001", "20230626", "20230626-02", "W", "100.00", "130.00"],
+        ["AC001", "20230630", "", "I", "0.39", "130.39"],
+    ]
+    assert rows[4:] == [
+        ["AC002", "20230610", "20230610-01", "D", "0.50", "0.50"],
+        ["AC002", "20230630", "", "I", "0.00", "0.50"],
+    ]
+
+
+def test_export_month_binary_matches_csv(bank, tmp_path):
+    csv_path, binary_path = tmp_path / "202306.csv", tmp_path / "202306.bin"
+    export_month(bank, 2023, 6, str(csv_path), str(binary_path))
+    data = binary_path.read_bytes()
+    assert RECORD.size == 44
+    assert len(data) == 6 * RECORD.size
+    records = read_records(memoryview(data))
+    with open(csv_path) as export:
+        rows = list(csv.DictReader(export))
+    for record, row in zip(records, rows):
+        assert record["account"].decode() == row["account"]
+        assert record["date"] == int(row["date"])
+        assert record["type"].decode() == row["type"]
+        assert record["amount"] == round(float(row["amount"]) * 100)
+        assert record["balance"] == round(float(row["balance"]) * 100)
+
+
+def test_export_month_quotes_csv_fields(tmp_path):
+    bank = Bank()
+    bank.add_transaction("20230601", 'AC,"01"', "D", "10")
+    path = tmp_path / "202306.csv"
+    export_month(bank, 2023, 6, csv_path=str(path))
+    with open(path, newline="") as export:
+        rows = list(csv.reader(export))
+    assert [row[0] for row in rows[1:]] == ['AC,"01"', 'AC,"01"']
+
+
+def test_export_month_rejects_long_ids_before_writing(bank, tmp_path):
+    bank.add_transaction("20230601", "AC" + "0" * 20, "D", "10")
+    csv_path, binary_path = tmp_path / "202306.csv", tmp_path / "202306.bin"
+    with pytest.raises(ValueError):
+        export_month(bank, 2023, 6, str(csv_path), str(binary_path))
+    assert not csv_path.exists() and not binary_path.exists()
+    # CSV alone has no width limit
+    assert export_month(bank, 2023, 6, csv_path=str(csv_path)) == 8
+
+
+def test_read_records_without_numpy(bank, tmp_path, monkeypatch):
+    path = tmp_path / "202306.bin"
+    export_month(bank, 2023, 6, binary_path=str(path))
+    monkeypatch.setattr(statement_export, "numpy", None)
+    records = read_records(path.read_bytes())
+    assert (b"AC001".ljust(16, b"\0"), 20230630, 0, b"I", 39, 13039) in records
@@ -0,0 +1,72 @@
+import functools
+import time
+from collections import defaultdict
+
+# Opt-in: while disabled a timed() wrapper costs one flag check per call.
+enabled = False
+timings = defaultdict(lambda: [0, 0])  # {name: [calls, total ns]}
+counters = defaultdict(int)  # {name: total}
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    timings.clear()
+    counters.clear()
+
+
+def timed(name):
+    """Decorator recording call count and wall time under name when enabled."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timing = timings[name]
+                timing[0] += 1
+                timing[1] += time.perf_counter_ns() - start
+
+        return wrapper
+
+    return decorator
+
+
+def count(name, amount=1):
+    if enabled:
+        counters[name] += amount
+
+
+def stats():
+    return {
+        "enabled": enabled,
+        "timings": {
+            name: {"calls": calls, "total_ms": total / 1e6, "mean_us": total / calls / 1e3}
+            for name, (calls, total) in sorted(timings.items())
+        },
+        "counters": dict(sorted(counters.items())),
+    }
+
+
+def format_stats():
+    lines = ["| Timer                            | Calls      | Total (ms) | Mean (us) |"]
+    for name, timing in stats()["timings"].items():
+        lines.append(
+            f"| {name:32} | {timing['calls']:10} | {timing['total_ms']:10.2f} | {timing['mean_us']:9.2f} |"
+        )
+    lines.append("| Counter                          | Total      |")
+    for name, total in counters.items():
+        lines.append(f"| {name:32} | {total:10} |")
+    return "\n".join(lines)
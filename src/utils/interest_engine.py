@@ -0,0 +1,115 @@
+import calendar
+from bisect import bisect_right
+
+try:
+    import numpy
+except ImportError:  # numpy is optional, batch_interest falls back to sweep_interest
+    numpy = None
+
+
+def rate_segments(interest_rules, year, month):
+    """Return [(first_day, rate)] covering every day of the month.
+
+    interest_rules must be sorted by date. Only the rule in force on the 1st and
+    the rules dated inside the month are visited.
+    """
+    last_day = calendar.monthrange(year, month)[1]
+    start_date = f"{year}{month:02}01"
+    end_date = f"{year}{month:02}{last_day:02}"
+    position = bisect_right(interest_rules, start_date, key=lambda rule: rule.date)
+    # rate in force on the 1st, 0 if no rule has started yet
+    rate = interest_rules[position - 1].rate if position else 0
+    segments = [(1, rate)]
+    while position < len(interest_rules) and interest_rules[position].date <= end_date:
+        rule = interest_rules[position]
+        day = int(rule.date[6:])
+        if segments[-1][0] == day:
+            segments[-1] = (day, rule.rate)
+        else:
+            segments.append((day, rule.rate))
+        position += 1
+    return segments
+
+
+def sweep_interest(opening_balance, days, amounts, segments, last_day):
+    """Annualized interest (sum of EOD balance * rate% * days) for one month.
+
+    days and amounts are the month's transactions in date order: the day of
+    the month and the signed amount (withdrawals negative). Sweeps the merged
+    transaction days and rate change days once, so the cost depends on the
+    number of breakpoints rather than the number of days.
+    """
+    end = last_day + 1
+    txn_count = len(days)
+    segment_count = len(segments)
+    txn_pos = segment_pos = 0
+    balance = opening_balance
+    rate = 0
+    annualized_interest = 0
+    day = 1
+    while day <= last_day:
+        # apply everything that happens on this day
+        while txn_pos < txn_count and days[txn_pos] == day:
+            balance += amounts[txn_pos]
+            txn_pos += 1
+        while segment_pos < segment_count and segments[segment_pos][0] == day:
+            rate = segments[segment_pos][1]
+            segment_pos += 1
+        # balance and rate stay constant until the next breakpoint
+        next_day = end
+        if txn_pos < txn_count:
+            next_day = days[txn_pos]
+        if segment_pos < segment_count and segments[segment_pos][0] < next_day:
+            next_day = segments[segment_pos][0]
+        annualized_interest += balance * rate * (next_day - day) / 100
+        day = next_day
+    return annualized_interest
+
+
+def tail_weights(segments, last_day):
+    """Return weights where weights[day] is the sum of rate% over day..last_day.
+
+    A movement of amount cents on day earns amount * weights[day] annualized
+    interest by the end of the month, so a month's interest is
+    opening_balance * weights[1] + sum(amount * weights[day]). Index 0 is unused.
+    """
+    weights = [0.0] * (last_day + 2)
+    rates = daily_rates(segments, last_day)
+    for day in range(last_day, 0, -1):
+        weights[day] = weights[day + 1] + rates[day - 1] / 100
+    return tuple(weights)
+
+
+def daily_rates(segments, last_day):
+    # expand rate segments to one rate per day of the month
+    rates = []
+    for index, (first_day, rate) in enumerate(segments):
+        next_day = segments[index + 1][0] if index + 1 < len(segments) else last_day + 1
+        rates.extend([rate] * (next_day - first_day))
+    return rates
+
+
+def batch_interest(opening_balances, movements, segments, last_day):
+    """Annualized interest for many accounts sharing the same rate segments.
+
+    opening_balances[i] and movements[i] (the (days, amounts) pair taken by
+    sweep_interest) belong to the same account. With numpy this builds an
+    accounts x days end of day balance matrix and multiplies it by the daily
+    rate vector in one go.
+    """
+    if numpy is None:
+        return [
+            sweep_interest(opening, days, amounts, segments, last_day)
+            for opening, (days, amounts) in zip(opening_balances, movements)
+        ]
+    rows, all_days, all_amounts = [], [], []
+    for row, (days, amounts) in enumerate(movements):
+        rows.extend([row] * len(days))
+        all_days.extend(day - 1 for day in days)
+        all_amounts.extend(amounts)
+    deltas = numpy.zeros((len(opening_balances), last_day))
+    numpy.add.at(deltas, (rows, all_days), all_amounts)
+    balances = numpy.cumsum(deltas, axis=1)
+    balances += numpy.asarray(opening_balances, dtype=float)[:, None]
+    rates = numpy.asarray(daily_rates(segments, last_day), dtype=float)
+    return (balances @ rates / 100).tolist()
@@ -0,0 +1,72 @@
+"""Validation and parsing of the fields typed at the Bank prompts.
+
+Everything here works on the raw strings and avoids datetime.strptime and
+float(): dates are checked against a days-per-month table and amounts are
+parsed straight to integer cents.
+"""
+
+import calendar
+from functools import lru_cache
+
+DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+TRANSACTION_TYPES = {"D": "D", "d": "D", "W": "W", "w": "W"}
+
+INVALID_AMOUNT = "Invalid amount. Must be a number. \n"
+TOO_MANY_DECIMALS = "Invalid amount. At most 2 decimal places are allowed. \n"
+
+
+@lru_cache(maxsize=4096)
+def parse_date(date_str):
+    # YYYYMMDD string to its int, None unless it is a calendar date;
+    # feeds repeat a handful of dates, so results are cached
+    if len(date_str) != 8 or not date_str.isascii() or not date_str.isdigit():
+        return None
+    date = int(date_str)
+    year, month, day = date // 10000, date // 100 % 100, date % 100
+    if year < 1 or not 1 <= month <= 12 or day < 1:
+        return None
+    if day > DAYS_IN_MONTH[month]:
+        if not (month == 2 and day == 29 and calendar.isleap(year)):
+            return None
+    return date
+
+
+def parse_year_month(year_month_str):
+    # YYYYMM string to (year, month), None unless it is a valid month
+    if (
+        len(year_month_str) != 6
+        or not year_month_str.isascii()
+        or not year_month_str.isdigit()
+    ):
+        return None
+    year, month = int(year_month_str[:4]), int(year_month_str[4:])
+    if year < 1 or not 1 <= month <= 12:
+        return None
+    return year, month
+
+
+def parse_type(type_str):
+    # "D" or "W" in either case, None otherwise
+    return TRANSACTION_TYPES.get(type_str)
+
+
+def parse_cents(amount_str):
+    """Parse a decimal amount such as "100", "-5" or "20.5" to integer cents.
+
+    Returns (cents, None), or (None, error message) if amount_str is not a
+    plain decimal number or has more than two decimal places.
+    """
+    whole, dot, fraction = amount_str.partition(".")
+    sign = 1
+    if whole[:1] in ("-", "+"):
+        sign = -1 if whole[0] == "-" else 1
+        whole = whole[1:]
+    if not (whole or fraction):
+        return None, INVALID_AMOUNT
+    for digits in (whole, fraction):
+        if digits and not (digits.isascii() and digits.isdigit()):
+            return None, INVALID_AMOUNT
+    if len(fraction) > 2:
+        return None, TOO_MANY_DECIMALS
+    cents = int(whole or "0") * 100 + int(fraction.ljust(2, "0"))
+    return sign * cents, None
@@ -0,0 +1,17 @@
+import sys
+from utils.instrumentation import timed
+
+
+@timed("render.write_lines")
+def write_lines(lines, out=None, batch_size=1024):
+    """Write an iterable of lines to out (stdout by default) in batches, so
+    large statements are streamed instead of built as one string."""
+    out = sys.stdout if out is None else out
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= batch_size:
+            out.write("".join(batch))
+            batch.clear()
+    if batch:
+        out.write("".join(batch))